@@ -0,0 +1,30 @@
+"""Unique item code per branch
+
+Revision ID: 3f9d5b72a0c6
+Revises: f2a07c81d6e9
+Create Date: 2026-01-21 16:48:30.117842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9d5b72a0c6'
+down_revision: Union[str, Sequence[str], None] = 'f2a07c81d6e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint('inventory_items_item_code_key', 'inventory_items', type_='unique')
+    op.create_unique_constraint('uq_inv_branch_code', 'inventory_items', ['branch_id', 'item_code'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_inv_branch_code', 'inventory_items', type_='unique')
+    op.create_unique_constraint('inventory_items_item_code_key', 'inventory_items', ['item_code'])
@@ -0,0 +1,28 @@
+"""Add attendance keyset index
+
+Revision ID: 5d8e1f0a7c42
+Revises: 2b63f56796f7
+Create Date: 2026-01-12 10:20:41.512309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e1f0a7c42'
+down_revision: Union[str, Sequence[str], None] = '2b63f56796f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_attendance_records_date_id', 'attendance_records', ['attendance_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attendance_records_date_id', table_name='attendance_records')
@@ -0,0 +1,28 @@
+"""Add lab results patient index
+
+Revision ID: 6c2d8e4a9f17
+Revises: 9b1e4c07f3a2
+Create Date: 2026-01-26 09:27:52.380915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c2d8e4a9f17'
+down_revision: Union[str, Sequence[str], None] = '9b1e4c07f3a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_lab_results_patient_id_id', 'lab_results', ['patient_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_lab_results_patient_id_id', table_name='lab_results')
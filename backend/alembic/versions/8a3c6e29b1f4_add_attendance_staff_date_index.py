@@ -0,0 +1,28 @@
+"""Add attendance staff/date index
+
+Revision ID: 8a3c6e29b1f4
+Revises: 5d8e1f0a7c42
+Create Date: 2026-01-13 09:41:17.208534
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a3c6e29b1f4'
+down_revision: Union[str, Sequence[str], None] = '5d8e1f0a7c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_attendance_records_staff_date', 'attendance_records', ['staff_id', 'attendance_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attendance_records_staff_date', table_name='attendance_records')
@@ -0,0 +1,34 @@
+"""Add inventory low stock partial index
+
+Revision ID: 9b1e4c07f3a2
+Revises: 3f9d5b72a0c6
+Create Date: 2026-01-22 12:05:19.664310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e4c07f3a2'
+down_revision: Union[str, Sequence[str], None] = '3f9d5b72a0c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_inventory_items_low_stock',
+        'inventory_items',
+        ['branch_id'],
+        unique=False,
+        postgresql_where=sa.text('is_active AND current_stock <= minimum_stock')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_inventory_items_low_stock', table_name='inventory_items')
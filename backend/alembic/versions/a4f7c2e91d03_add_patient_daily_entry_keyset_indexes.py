@@ -0,0 +1,30 @@
+"""Add patient and daily entry keyset indexes
+
+Revision ID: a4f7c2e91d03
+Revises: 6c2d8e4a9f17
+Create Date: 2026-02-03 11:42:18.204417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f7c2e91d03'
+down_revision: Union[str, Sequence[str], None] = '6c2d8e4a9f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_patients_branch_registration_id', 'patients', ['branch_id', 'registration_date', 'id'], unique=False)
+    op.create_index('ix_daily_entries_branch_date_id', 'daily_entries', ['branch_id', 'entry_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_entries_branch_date_id', table_name='daily_entries')
+    op.drop_index('ix_patients_branch_registration_id', table_name='patients')
@@ -0,0 +1,36 @@
+"""Add branch patient counter
+
+Revision ID: b8e3d51f6a29
+Revises: a4f7c2e91d03
+Create Date: 2026-02-05 15:06:33.718920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3d51f6a29'
+down_revision: Union[str, Sequence[str], None] = 'a4f7c2e91d03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('branches', sa.Column('last_patient_no', sa.Integer(), nullable=False, server_default='0'))
+    # Seed each branch from the numeric suffix of its existing patient IDs
+    op.execute("""
+        UPDATE branches SET last_patient_no = COALESCE((
+            SELECT MAX(CAST(RIGHT(patient_id, 4) AS INTEGER))
+            FROM patients
+            WHERE patients.branch_id = branches.id AND RIGHT(patient_id, 4) ~ '^[0-9]{4}$'
+        ), 0)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('branches', 'last_patient_no')
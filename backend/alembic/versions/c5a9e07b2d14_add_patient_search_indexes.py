@@ -0,0 +1,47 @@
+"""Add patient search indexes
+
+Revision ID: c5a9e07b2d14
+Revises: b8e3d51f6a29
+Create Date: 2026-02-09 10:18:54.633021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a9e07b2d14'
+down_revision: Union[str, Sequence[str], None] = 'b8e3d51f6a29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_COLUMNS = ('first_name', 'last_name', 'phone', 'patient_id')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The list always filters on is_active, so it belongs ahead of the sort key
+    op.drop_index('ix_patients_branch_registration_id', table_name='patients')
+    op.create_index('ix_patients_branch_active_reg', 'patients', ['branch_id', 'is_active', 'registration_date', 'id'], unique=False)
+
+    # ILIKE search on names and phone (substring) and patient ID (prefix)
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_COLUMNS:
+        op.create_index(
+            f'ix_patients_{column}_trgm',
+            'patients',
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in TRIGRAM_COLUMNS:
+        op.drop_index(f'ix_patients_{column}_trgm', table_name='patients')
+    op.drop_index('ix_patients_branch_active_reg', table_name='patients')
+    op.create_index('ix_patients_branch_registration_id', 'patients', ['branch_id', 'registration_date', 'id'], unique=False)
@@ -0,0 +1,42 @@
+"""Generate salary totals
+
+Revision ID: c71f4d0e9a25
+Revises: 8a3c6e29b1f4
+Create Date: 2026-01-14 11:02:55.730148
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71f4d0e9a25'
+down_revision: Union[str, Sequence[str], None] = '8a3c6e29b1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GROSS_SALARY = "base_salary + COALESCE(bonus, 0)"
+NET_SALARY = "base_salary + COALESCE(bonus, 0) - COALESCE(deductions, 0)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # PostgreSQL cannot turn an existing column into a generated one, so the
+    # totals are dropped and re-added; they are fully derived from the components
+    op.drop_column('salary_records', 'net_salary')
+    op.drop_column('salary_records', 'gross_salary')
+    op.add_column('salary_records', sa.Column('gross_salary', sa.DECIMAL(precision=12, scale=2), sa.Computed(GROSS_SALARY, persisted=True)))
+    op.add_column('salary_records', sa.Column('net_salary', sa.DECIMAL(precision=12, scale=2), sa.Computed(NET_SALARY, persisted=True)))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('salary_records', 'net_salary')
+    op.drop_column('salary_records', 'gross_salary')
+    op.add_column('salary_records', sa.Column('gross_salary', sa.DECIMAL(precision=12, scale=2), nullable=True))
+    op.add_column('salary_records', sa.Column('net_salary', sa.DECIMAL(precision=12, scale=2), nullable=True))
+    op.execute(f"UPDATE salary_records SET gross_salary = {GROSS_SALARY}, net_salary = {NET_SALARY}")
+    op.alter_column('salary_records', 'gross_salary', nullable=False)
+    op.alter_column('salary_records', 'net_salary', nullable=False)
@@ -0,0 +1,52 @@
+"""Add patient search blob
+
+Revision ID: d2f6b83c0e57
+Revises: c5a9e07b2d14
+Create Date: 2026-02-12 14:51:07.392846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b83c0e57'
+down_revision: Union[str, Sequence[str], None] = 'c5a9e07b2d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_BLOB = "first_name || ' ' || last_name || ' ' || phone || ' ' || patient_id"
+TRIGRAM_COLUMNS = ('first_name', 'last_name', 'phone', 'patient_id')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # One generated column and index replace the per-column trigram indexes
+    op.add_column('patients', sa.Column('search_blob', sa.Text(), sa.Computed(SEARCH_BLOB, persisted=True)))
+    op.create_index(
+        'ix_patients_search_trgm',
+        'patients',
+        ['search_blob'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'search_blob': 'gin_trgm_ops'}
+    )
+    for column in TRIGRAM_COLUMNS:
+        op.drop_index(f'ix_patients_{column}_trgm', table_name='patients')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in TRIGRAM_COLUMNS:
+        op.create_index(
+            f'ix_patients_{column}_trgm',
+            'patients',
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'}
+        )
+    op.drop_index('ix_patients_search_trgm', table_name='patients')
+    op.drop_column('patients', 'search_blob')
@@ -0,0 +1,30 @@
+"""Add inventory filter indexes
+
+Revision ID: e4b92a5f1d38
+Revises: c71f4d0e9a25
+Create Date: 2026-01-19 14:36:08.419027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b92a5f1d38'
+down_revision: Union[str, Sequence[str], None] = 'c71f4d0e9a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_inventory_items_branch_active_stock', 'inventory_items', ['branch_id', 'is_active', 'current_stock', 'minimum_stock'], unique=False)
+    op.create_index('ix_inventory_items_branch_active_expiry', 'inventory_items', ['branch_id', 'is_active', 'expiry_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_inventory_items_branch_active_expiry', table_name='inventory_items')
+    op.drop_index('ix_inventory_items_branch_active_stock', table_name='inventory_items')
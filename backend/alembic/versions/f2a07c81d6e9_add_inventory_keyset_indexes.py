@@ -0,0 +1,30 @@
+"""Add inventory keyset indexes
+
+Revision ID: f2a07c81d6e9
+Revises: e4b92a5f1d38
+Create Date: 2026-01-20 10:12:47.903561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a07c81d6e9'
+down_revision: Union[str, Sequence[str], None] = 'e4b92a5f1d38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_inventory_items_branch_active_name_id', 'inventory_items', ['branch_id', 'is_active', 'item_name', 'id'], unique=False)
+    op.create_index('ix_stock_movements_item_date_id', 'stock_movements', ['inventory_item_id', 'movement_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_movements_item_date_id', table_name='stock_movements')
+    op.drop_index('ix_inventory_items_branch_active_name_id', table_name='inventory_items')
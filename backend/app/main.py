@@ -1,8 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 import os
+import logging
 from datetime import datetime
 
 
@@ -14,6 +16,10 @@ from app.routes.inventory_management import router as inventory_router
 from app.routes.export_routes import router as export_router
 from app.routes.analytics import router as analytics_router
 from app.routes.daily_entry import router as daily_entry_router
+from app.services.redis_cache import cache
+from app.utils.database import engine
+
+logger = logging.getLogger(__name__)
 
 # Create FastAPI app
 app = FastAPI(
@@ -31,6 +37,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON list payloads; small responses are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
@@ -41,6 +50,15 @@ app.include_router(export_router, prefix="/api/export", tags=["Export"])
 app.include_router(analytics_router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(daily_entry_router, prefix="/api/daily-entry", tags=["Daily Entry"])
 
+@app.on_event("startup")
+async def startup():
+    await cache.connect()
+    logger.info("Database pool: %s", engine.pool.status())
+
+@app.on_event("shutdown")
+async def shutdown():
+    await cache.disconnect()
+
 @app.get("/")
 async def root():
     return {"message": "VaidyaVihar Diagnostic ERP API", "version": "2.0.0", "status": "running"}
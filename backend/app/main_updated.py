@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 import os
@@ -14,6 +15,7 @@ from app.routes.inventory_management import router as inventory_router
 from app.routes.export_routes import router as export_router
 from app.routes.analytics import router as analytics_router
 from app.routes.daily_entry import router as daily_entry_router
+from app.services.redis_cache import cache
 
 # Import NEW modern feature routers
 from app.routes.doctor_management import router as doctor_router
@@ -38,6 +40,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON list/report payloads; small responses are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 # Include EXISTING routers
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
@@ -54,6 +59,14 @@ app.include_router(report_distribution_router, prefix="/api/reports", tags=["Rep
 app.include_router(ai_router, prefix="/api/ai", tags=["AI & Recommendations"])
 
 
+@app.on_event("startup")
+async def startup():
+    await cache.connect()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await cache.disconnect()
+
 @app.get("/")
 async def root():
     return {
@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, DECIMAL
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, DECIMAL, Index, Computed, UniqueConstraint
+from sqlalchemy import case, null, text
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
+from datetime import datetime, timedelta
 from app.utils.database import Base
 
 class Branch(Base):
@@ -18,6 +21,8 @@ class Branch(Base):
     license_number = Column(String(100), unique=True)
     established_date = Column(DateTime, default=func.now())
     is_active = Column(Boolean, default=True)
+    # Last sequential number handed out for patient IDs in this branch
+    last_patient_no = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
@@ -54,6 +59,12 @@ class User(Base):
 
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        # Keyset pagination on the active patients of a branch: ORDER BY registration_date DESC, id DESC
+        Index("ix_patients_branch_active_reg", "branch_id", "is_active", "registration_date", "id"),
+        # Patient search: one ILIKE '%x%' over search_blob, served by pg_trgm
+        Index("ix_patients_search_trgm", "search_blob", postgresql_using="gin", postgresql_ops={"search_blob": "gin_trgm_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(String(20), unique=True, nullable=False)  # Auto-generated
@@ -83,6 +94,11 @@ class Patient(Base):
     registration_date = Column(DateTime, default=func.now())
     is_active = Column(Boolean, default=True)
     
+    # Search text (generated by PostgreSQL); deferred since only WHERE clauses use it
+    search_blob = deferred(Column(Text, Computed(
+        "first_name || ' ' || last_name || ' ' || phone || ' ' || patient_id", persisted=True
+    )))
+    
     # Relationships
     branch = relationship("Branch", back_populates="patients")
     daily_entries = relationship("DailyEntry", back_populates="patient")
@@ -92,6 +108,10 @@ class Patient(Base):
 
 class DailyEntry(Base):
     __tablename__ = "daily_entries"
+    __table_args__ = (
+        # Keyset pagination on the daily entry list: ORDER BY entry_date DESC, id DESC
+        Index("ix_daily_entries_branch_date_id", "branch_id", "entry_date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
@@ -169,6 +189,12 @@ class Staff(Base):
 
 class AttendanceRecord(Base):
     __tablename__ = "attendance_records"
+    __table_args__ = (
+        # Keyset pagination on the attendance list: ORDER BY attendance_date DESC, id DESC
+        Index("ix_attendance_records_date_id", "attendance_date", "id"),
+        # Per-staff day lookups (duplicate check, staff filters) seek on a half-open range
+        Index("ix_attendance_records_staff_date", "staff_id", "attendance_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     staff_id = Column(Integer, ForeignKey("staff.id"), nullable=False)
@@ -205,9 +231,9 @@ class SalaryRecord(Base):
     bonus = Column(DECIMAL(10, 2), default=0)
     deductions = Column(DECIMAL(10, 2), default=0)
     
-    # Calculated Fields
-    gross_salary = Column(DECIMAL(12, 2), nullable=False)
-    net_salary = Column(DECIMAL(12, 2), nullable=False)
+    # Calculated Fields (generated by PostgreSQL from the components above)
+    gross_salary = Column(DECIMAL(12, 2), Computed("base_salary + COALESCE(bonus, 0)", persisted=True))
+    net_salary = Column(DECIMAL(12, 2), Computed("base_salary + COALESCE(bonus, 0) - COALESCE(deductions, 0)", persisted=True))
     
     # Payment Details
     payment_date = Column(DateTime, nullable=True)
@@ -221,12 +247,27 @@ class SalaryRecord(Base):
 
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
+    __table_args__ = (
+        # Low-stock and expiry filters on the active items of a branch
+        Index("ix_inventory_items_branch_active_stock", "branch_id", "is_active", "current_stock", "minimum_stock"),
+        Index("ix_inventory_items_branch_active_expiry", "branch_id", "is_active", "expiry_date"),
+        # Keyset pagination: ORDER BY item_name DESC, id DESC
+        Index("ix_inventory_items_branch_active_name_id", "branch_id", "is_active", "item_name", "id"),
+        # Low-stock alerts only ever read the few active items at or below minimum
+        Index(
+            "ix_inventory_items_low_stock",
+            "branch_id",
+            postgresql_where=text("is_active AND current_stock <= minimum_stock")
+        ),
+        # Item codes are unique per branch
+        UniqueConstraint("branch_id", "item_code", name="uq_inv_branch_code"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
     
     # Item Details
-    item_code = Column(String(50), unique=True, nullable=False)
+    item_code = Column(String(50), nullable=False)
     item_name = Column(String(200), nullable=False)
     category = Column(String(100), nullable=False)  # reagent, equipment, consumable, medicine
     subcategory = Column(String(100), nullable=True)
@@ -258,9 +299,58 @@ class InventoryItem(Base):
     # Relationships
     branch = relationship("Branch", back_populates="inventory_items")
     stock_movements = relationship("StockMovement", back_populates="item")
+    
+    # Calculated fields: plain attributes on instances, CASE expressions in queries
+    @hybrid_property
+    def stock_status(self):
+        if self.current_stock <= 0:
+            return "Out of Stock"
+        if self.current_stock <= self.minimum_stock:
+            return "Low Stock"
+        if self.current_stock >= self.maximum_stock:
+            return "Overstocked"
+        return "Normal"
+    
+    @stock_status.expression
+    def stock_status(cls):
+        return case(
+            (cls.current_stock <= 0, "Out of Stock"),
+            (cls.current_stock <= cls.minimum_stock, "Low Stock"),
+            (cls.current_stock >= cls.maximum_stock, "Overstocked"),
+            else_="Normal"
+        )
+    
+    @hybrid_property
+    def expiry_status(self):
+        if self.expiry_date is None:
+            return None
+        days_to_expiry = (self.expiry_date - datetime.now()).days
+        if days_to_expiry < 0:
+            return "Expired"
+        if days_to_expiry <= 30:
+            return "Expiring Soon"
+        return "Valid"
+    
+    @expiry_status.expression
+    def expiry_status(cls):
+        now = datetime.now()
+        return case(
+            (cls.expiry_date.is_(None), null()),
+            (cls.expiry_date < now, "Expired"),
+            (cls.expiry_date < now + timedelta(days=31), "Expiring Soon"),
+            else_="Valid"
+        )
+    
+    @hybrid_property
+    def total_value(self):
+        return self.current_stock * self.purchase_price
 
 class StockMovement(Base):
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Per-item history, keyset paginated on (movement_date, id)
+        Index("ix_stock_movements_item_date_id", "inventory_item_id", "movement_date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False)
@@ -371,6 +461,10 @@ class InvoiceItem(Base):
 
 class LabResult(Base):
     __tablename__ = "lab_results"
+    __table_args__ = (
+        # A patient's results, newest first
+        Index("ix_lab_results_patient_id_id", "patient_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
@@ -1,17 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.utils.database import SessionLocal
+from app.utils.database import get_db
 from app.models.user import User
 from app.utils.auth_guard import get_current_user
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 @router.get("/activity-logs/")
 def list_logs(
     current_user: User = Depends(get_current_user),
@@ -5,11 +5,43 @@ This module contains models for managing doctors across all branches
 in the city, including their patient report distribution preferences.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, DECIMAL, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, DECIMAL, JSON, Index, Sequence, DDL, cast, event, select
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.utils.database import Base
 
+# Public doctor numbers (DOC-00001, ...) come from a sequence evaluated inside the INSERT
+doctor_number_seq = Sequence("doctor_number_seq", metadata=Base.metadata)
+
+# Doctors created before the sequence carry random DOC-xxxxx numbers; move the
+# sequence past the highest one so new numbers never collide. Idempotent: it
+# never moves the sequence backwards
+SEED_DOCTOR_NUMBER_SEQ = """
+    DO $$
+    DECLARE
+        top BIGINT;
+    BEGIN
+        IF to_regclass('doctors') IS NOT NULL THEN
+            SELECT MAX(CAST(SUBSTRING(doctor_id FROM 5) AS BIGINT)) INTO top
+            FROM doctors
+            WHERE doctor_id ~ '^DOC-[0-9]+$';
+            IF top >= (SELECT last_value FROM doctor_number_seq) THEN
+                PERFORM setval('doctor_number_seq', top);
+            END IF;
+        END IF;
+    END $$
+"""
+
+event.listen(doctor_number_seq, "after_create", DDL(SEED_DOCTOR_NUMBER_SEQ).execute_if(dialect="postgresql"))
+
+
+def _next_doctor_id():
+    """DOC- plus the next sequence value, zero-padded to at least five digits (never truncated)"""
+    number = cast(select(doctor_number_seq.next_value().label("n")).subquery().c.n, String)
+    return select(
+        func.concat("DOC-", func.lpad(number, func.greatest(5, func.length(number)), "0"))
+    ).scalar_subquery()
+
 
 class Doctor(Base):
     """
@@ -18,9 +50,19 @@ class Doctor(Base):
     from any diagnostic test performed at any branch.
     """
     __tablename__ = "doctors"
+    __table_args__ = (
+        # Doctor list: newest first, optionally narrowed to one specialization
+        Index("ix_doctors_created_at", "created_at"),
+        Index("ix_doctors_specialization_created", "specialization", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    doctor_id = Column(String(20), unique=True, nullable=False)  # DOC-XXXX format
+    doctor_id = Column(
+        String(20),
+        unique=True,
+        nullable=False,
+        default=_next_doctor_id()
+    )  # DOC-XXXXX format
     
     # Personal Information
     first_name = Column(String(100), nullable=False)
@@ -111,6 +153,12 @@ class DoctorBranch(Base):
     A doctor can be associated with multiple branches.
     """
     __tablename__ = "doctor_branches"
+    __table_args__ = (
+        # A doctor's assignments (eager loads, assignment lookups by doctor and branch)
+        Index("ix_doctor_branches_doctor_branch", "doctor_id", "branch_id"),
+        # Doctors of a branch: list filter and automatic report distribution
+        Index("ix_doctor_branches_branch_active", "branch_id", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
@@ -161,6 +209,14 @@ class ReportDistribution(Base):
     Records which reports were sent to which doctors and delivery status.
     """
     __tablename__ = "report_distributions"
+    __table_args__ = (
+        # Doctor portal lists/counts: filter by doctor, order or range on created_at
+        Index("ix_report_dist_doctor_created", "doctor_id", "created_at"),
+        Index("ix_report_dist_doctor_status", "doctor_id", "delivery_status"),
+        # Per-result tracking and duplicate checks during distribution
+        Index("ix_report_dist_lab_result_doctor", "lab_result_id", "doctor_id"),
+        Index("ix_report_dist_patient", "patient_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     distribution_id = Column(String(30), unique=True, nullable=False)  # RD-XXXXXXXX format
@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index, text
 from app.utils.database import Base
 
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
+    __table_args__ = (
+        # Partial index: only rows below threshold are stored, so the low-stock list stays small
+        Index("ix_inventory_items_below_threshold", "id", postgresql_where=text("quantity < threshold")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
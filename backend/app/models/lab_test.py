@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.utils.database import Base
 
 class LabTest(Base):
     __tablename__ = "lab_tests"
+    __table_args__ = (
+        # Technician dashboards count pending/completed tests per technician
+        Index("ix_lab_tests_technician_status", "technician_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patient_entries.id"))
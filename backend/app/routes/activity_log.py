@@ -1,18 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from app.utils.database import SessionLocal
+from app.utils.database import get_db
 from app.models.user import User
 from app.utils.auth_guard import get_current_user
 
-router = APIRouter()
-
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Admin-only route to view activity logs
 @router.get("/activity-logs/")
@@ -33,7 +26,7 @@ def list_logs(
             "user_id": log.user_id,
             "action": log.action,
             "detail": log.detail,
-            "timestamp": log.timestamp.isoformat()
+            "timestamp": log.timestamp
         }
         for log in logs
     ]
\ No newline at end of file
@@ -11,6 +11,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict
 from datetime import datetime
+from collections import Counter
 
 from app.utils.database import get_db
 from app.utils.auth_system import require_staff, get_current_user
@@ -108,25 +109,28 @@ def get_ai_test_recommendations(
         medical_history=request.medical_history
     )
     
-    # Calculate totals
-    total_cost = sum(r.estimated_cost for r in recommendations)
-    critical = sum(1 for r in recommendations if r.priority == "critical")
-    moderate = sum(1 for r in recommendations if r.priority == "moderate")
+    # Totals, priority counts and response rows in a single pass
+    total_cost = 0
+    priority_counts = Counter()
+    items = []
+    for r in recommendations:
+        total_cost += r.estimated_cost
+        priority_counts[r.priority] += 1
+        items.append({
+            "test_code": r.test_code,
+            "test_name": r.test_name,
+            "category": r.category,
+            "priority": r.priority,
+            "reason": r.reason,
+            "estimated_cost": r.estimated_cost,
+            "preparation_instructions": r.preparation_instructions
+        })
+    critical = priority_counts["critical"]
+    moderate = priority_counts["moderate"]
     routine = len(recommendations) - critical - moderate
     
     return TestRecommendationResponse(
-        recommendations=[
-            {
-                "test_code": r.test_code,
-                "test_name": r.test_name,
-                "category": r.category,
-                "priority": r.priority,
-                "reason": r.reason,
-                "estimated_cost": r.estimated_cost,
-                "preparation_instructions": r.preparation_instructions
-            }
-            for r in recommendations
-        ],
+        recommendations=items,
         total_tests=len(recommendations),
         total_estimated_cost=total_cost,
         critical_tests=critical,
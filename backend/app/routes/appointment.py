@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.models.appointment import Appointment
 from app.schemas.appointment import AppointmentCreate, AppointmentResponse
@@ -8,10 +9,11 @@ router = APIRouter()
 
 @router.post("/appointments/", response_model=AppointmentResponse, status_code=201)
 def create_appointment(appointment: AppointmentCreate, db: Session = Depends(get_db)):
-    new_appointment = Appointment(**appointment.model_dump())
-    db.add(new_appointment)
+    # RETURNING hands back the stored row, so no refresh SELECT after the commit
+    new_appointment = db.execute(
+        insert(Appointment).values(**appointment.model_dump()).returning(*Appointment.__table__.columns)
+    ).mappings().one()
     db.commit()
-    db.refresh(new_appointment)
     return new_appointment
 
 @router.get("/appointments/by-day/{calendar_day_id}", response_model=list[AppointmentResponse])
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.utils.database import SessionLocal
+from app.utils.database import get_db
 from app.models.user import User
 from app.utils.security import hash_password, verify_password
 from jose import JWTError, jwt
@@ -12,13 +12,6 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/register/")
 def register(username: str, password: str, role: str = "staff", db: Session = Depends(get_db)):
     if db.query(User).filter(User.username == username).first():
@@ -239,6 +239,8 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
 def logout(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """User logout endpoint"""
     
+    auth_guard.invalidate_user_cache(current_user.username)
+    
     # Log activity
     auth_guard.log_activity(
         db=db, 
@@ -298,6 +300,7 @@ def change_password(
     current_user.hashed_password = hashed_new_password
     
     db.commit()
+    auth_guard.invalidate_user_cache(current_user.username)
     
     # Log activity
     auth_guard.log_activity(
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.utils.database import SessionLocal
+from app.utils.database import get_db
 from app.models.billing_entry import BillingEntry
 from app.utils.auth_guard import get_current_user
 from app.models.user import User
@@ -8,13 +8,6 @@ from fastapi import HTTPException
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/billing/")
 def create_bill(patient_id: int, total_amount: float, paid_amount: float, status: str = "pending", db: Session = Depends(get_db)):
     bill = BillingEntry(patient_id=patient_id, total_amount=total_amount, paid_amount=paid_amount, status=status)
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, func, case, distinct
 from typing import List, Optional
 from datetime import datetime
 
 from app.utils.database import get_db
 from app.utils.auth_system import auth_guard, require_staff, get_current_user
+from app.utils.date_ranges import month_bounds
 from app.models import User, Branch
 from pydantic import BaseModel, Field
 
@@ -374,11 +375,7 @@ def get_branch_statistics(
     from app.models import Staff, Patient, DailyEntry, InventoryItem, Invoice
     
     # Calculate date range for the month
-    start_date = datetime(year, month, 1)
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1) - datetime.timedelta(days=1)
-    else:
-        end_date = datetime(year, month + 1, 1) - datetime.timedelta(days=1)
+    start_date, end_date = month_bounds(year, month)
     
     # Total staff
     total_staff = db.query(Staff).filter(
@@ -396,26 +393,30 @@ def get_branch_statistics(
         )
     ).count()
     
-    # Monthly revenue
-    daily_entries = db.query(DailyEntry).filter(
+    # Monthly revenue, appointments, pending payments and unique tests in one pass
+    monthly = db.query(
+        func.coalesce(func.sum(DailyEntry.total_amount), 0).label("revenue"),
+        func.count(DailyEntry.id).label("appointments"),
+        func.coalesce(func.sum(case(
+            (DailyEntry.payment_status != 'paid', DailyEntry.total_amount - DailyEntry.amount_paid),
+            else_=0
+        )), 0).label("pending"),
+        func.count(distinct(func.nullif(DailyEntry.test_names, ''))).label("services")
+    ).filter(
         and_(
             DailyEntry.branch_id == branch_id,
             DailyEntry.entry_date >= start_date,
-            DailyEntry.entry_date <= end_date
+            DailyEntry.entry_date < end_date
         )
-    ).all()
+    ).one()
     
-    monthly_revenue = sum(float(entry.total_amount) for entry in daily_entries)
+    monthly_revenue = float(monthly.revenue)
     
     # Total appointments (based on daily entries)
-    total_appointments = len(daily_entries)
+    total_appointments = monthly.appointments
     
     # Pending payments
-    pending_payments = sum(
-        float(entry.total_amount - entry.amount_paid) 
-        for entry in daily_entries 
-        if entry.payment_status != 'paid'
-    )
+    pending_payments = float(monthly.pending)
     
     # Inventory value
     inventory_items = db.query(InventoryItem).filter(
@@ -431,7 +432,7 @@ def get_branch_statistics(
     )
     
     # Active services (unique test names performed in the month)
-    active_services = len(set(entry.test_names for entry in daily_entries if entry.test_names))
+    active_services = monthly.services
     
     return BranchStatistics(
         branch_id=branch.id,
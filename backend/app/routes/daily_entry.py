@@ -38,7 +38,7 @@ class DailyEntryResponse(BaseModel):
         from_attributes = True
 
 @router.post("/daily-entries", response_model=DailyEntryResponse)
-async def create_daily_entry(entry: DailyEntryCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def create_daily_entry(entry: DailyEntryCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     """Create a new daily entry for patient visit"""
     
     # Verify user has access to this branch
@@ -71,7 +71,7 @@ async def create_daily_entry(entry: DailyEntryCreate, db: Session = Depends(get_
     return DailyEntryResponse(**result._asdict())
 
 @router.get("/daily-entries", response_model=List[DailyEntryResponse])
-async def get_daily_entries(
+def get_daily_entries(
     date: str = None,
     branch_id: int = None,
     db: Session = Depends(get_db), 
@@ -101,7 +101,7 @@ async def get_daily_entries(
     return [DailyEntryResponse(**row._asdict()) for row in results]
 
 @router.get("/daily-entries/{entry_id}", response_model=DailyEntryResponse)
-async def get_daily_entry(entry_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def get_daily_entry(entry_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     """Get a specific daily entry"""
     
     result = db.execute("SELECT * FROM daily_entries WHERE id = ?", (entry_id,)).fetchone()
@@ -115,7 +115,7 @@ async def get_daily_entry(entry_id: int, db: Session = Depends(get_db), current_
     return DailyEntryResponse(**result._asdict())
 
 @router.put("/daily-entries/{entry_id}", response_model=DailyEntryResponse)
-async def update_daily_entry(
+def update_daily_entry(
     entry_id: int, 
     entry_update: DailyEntryCreate,
     db: Session = Depends(get_db), 
@@ -156,7 +156,7 @@ async def update_daily_entry(
     return DailyEntryResponse(**result._asdict())
 
 @router.delete("/daily-entries/{entry_id}")
-async def delete_daily_entry(entry_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def delete_daily_entry(entry_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     """Delete a daily entry"""
     
     # Check if entry exists and user has access
@@ -174,7 +174,7 @@ async def delete_daily_entry(entry_id: int, db: Session = Depends(get_db), curre
     return {"message": "Entry deleted successfully"}
 
 @router.get("/daily-summary")
-async def get_daily_summary(
+def get_daily_summary(
     date: str = None,
     branch_id: int = None,
     db: Session = Depends(get_db), 
@@ -1,19 +1,12 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.utils.database import SessionLocal
+from app.utils.database import get_db
 from app.models.calendar_day import CalendarDay
 from app.models.expense_entry import ExpenseEntry
 from app.models.note_entry import NoteEntry
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/daily-report/{calendar_day_id}")
 def generate_daily_report(calendar_day_id: int, db: Session = Depends(get_db)):
     day = db.query(CalendarDay).filter(CalendarDay.id == calendar_day_id).first()
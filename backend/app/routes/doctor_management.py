@@ -9,15 +9,18 @@ Provides comprehensive doctor management including:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, or_, desc, func, case, update, exists, select, lambda_stmt
 from typing import List, Optional
 from datetime import datetime, timedelta
 import uuid
-import random
 
 from app.utils.database import get_db
 from app.utils.auth_system import auth_guard, require_staff, get_current_user, require_role
+from app.services.redis_cache import cache
 from app.models import User, Branch, Patient, LabResult, Doctor as DoctorModel
 from app.models.doctor import (
     Doctor, DoctorBranch, ReportDistribution, ReportTemplate, 
@@ -26,7 +29,7 @@ from app.models.doctor import (
 from pydantic import BaseModel, Field, EmailStr
 from enum import Enum
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 # ============ Pydantic Schemas ============
@@ -148,10 +151,29 @@ class DoctorListResponse(BaseModel):
 
 # ============ Helper Functions ============
 
-def generate_doctor_id():
-    """Generate unique doctor ID"""
-    number = random.randint(1, 99999)
-    return f"DOC-{number:05d}"
+UNREAD_REPORT_STATUSES = ("pending", "sent", "delivered")
+
+# Doctor columns backing DoctorResponse, for list queries that skip ORM hydration
+DOCTOR_RESPONSE_COLUMNS = [
+    getattr(Doctor, name) for name in DoctorResponse.model_fields if name != "branches"
+]
+
+
+def doctor_report_counts(db: Session, doctor_id: int, since: datetime) -> dict:
+    """Received-since and unread report counts for a doctor in one aggregate query"""
+    received, unread = db.query(
+        func.coalesce(func.sum(case((ReportDistribution.created_at >= since, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((ReportDistribution.delivery_status.in_(UNREAD_REPORT_STATUSES), 1), else_=0)), 0)
+    ).filter(ReportDistribution.doctor_id == doctor_id).one()
+    return {"received": received, "unread": unread}
+
+
+def doctor_unread_count(db: Session, doctor_id: int) -> int:
+    """Reports delivered to a doctor that they have not opened yet"""
+    return db.query(func.count(ReportDistribution.id)).filter(
+        ReportDistribution.doctor_id == doctor_id,
+        ReportDistribution.delivery_status.in_(UNREAD_REPORT_STATUSES)
+    ).scalar()
 
 
 # ============ Doctor CRUD Routes ============
@@ -159,33 +181,32 @@ def generate_doctor_id():
 @router.post("/doctors/", response_model=DoctorResponse, status_code=201)
 def create_doctor(
     doctor_data: DoctorCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_staff),
     db: Session = Depends(get_db)
 ):
     """Create a new doctor record"""
     
-    # Check for duplicate email
-    existing = db.query(Doctor).filter(Doctor.email == doctor_data.email).first()
-    if existing:
+    # Check for duplicate email and phone in one round trip; EXISTS stops at the first match
+    email_taken, phone_taken = db.query(
+        exists().where(Doctor.email == doctor_data.email),
+        exists().where(Doctor.phone == doctor_data.phone)
+    ).one()
+    
+    if email_taken:
         raise HTTPException(
             status_code=400,
             detail="Doctor with this email already exists"
         )
     
-    # Check for duplicate phone
-    existing = db.query(Doctor).filter(Doctor.phone == doctor_data.phone).first()
-    if existing:
+    if phone_taken:
         raise HTTPException(
             status_code=400,
             detail="Doctor with this phone number already exists"
         )
     
-    # Generate doctor ID
-    doctor_id = generate_doctor_id()
-    
-    # Create doctor
+    # Create doctor; doctor_id is assigned from doctor_number_seq by the INSERT
     db_doctor = Doctor(
-        doctor_id=doctor_id,
         first_name=doctor_data.first_name,
         last_name=doctor_data.last_name,
         email=doctor_data.email,
@@ -211,6 +232,8 @@ def create_doctor(
     db.commit()
     db.refresh(db_doctor)
     
+    background_tasks.add_task(cache.invalidate_doctor_specializations)
+    
     # Log activity
     auth_guard.log_activity(
         db=db,
@@ -240,46 +263,58 @@ def get_doctors(
     Get list of all doctors across all branches.
     Supports city-wide search and filtering.
     """
-    query = db.query(Doctor)
+    # lambda_stmt caches the compiled SQL per filter combination; values bind as parameters
+    stmt = lambda_stmt(lambda: select(*DOCTOR_RESPONSE_COLUMNS))
+    count_stmt = lambda_stmt(lambda: select(func.count(Doctor.id)))
+    criteria = []
     
     # Search filter
     if search:
-        search_filter = or_(
-            Doctor.first_name.ilike(f"%{search}%"),
-            Doctor.last_name.ilike(f"%{search}%"),
-            Doctor.email.ilike(f"%{search}%"),
-            Doctor.phone.ilike(f"%{search}%"),
-            Doctor.specialization.ilike(f"%{search}%"),
-            Doctor.qualification.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
+        pattern = f"%{search}%"
+        criteria.append(lambda s: s.where(or_(
+            Doctor.first_name.ilike(pattern),
+            Doctor.last_name.ilike(pattern),
+            Doctor.email.ilike(pattern),
+            Doctor.phone.ilike(pattern),
+            Doctor.specialization.ilike(pattern),
+            Doctor.qualification.ilike(pattern)
+        )))
     
     # Specialization filter
     if specialization:
-        query = query.filter(Doctor.specialization == specialization)
+        criteria.append(lambda s: s.where(Doctor.specialization == specialization))
     
     # City filter
     if city:
-        query = query.filter(Doctor.clinic_city.ilike(f"%{city}%"))
+        city_pattern = f"%{city}%"
+        criteria.append(lambda s: s.where(Doctor.clinic_city.ilike(city_pattern)))
     
     # Active filter
     if is_active is not None:
-        query = query.filter(Doctor.is_active == is_active)
+        criteria.append(lambda s: s.where(Doctor.is_active == is_active))
     
     # Branch filter (doctors assigned to specific branch)
     if branch_id:
-        query = query.join(DoctorBranch).filter(
+        criteria.append(lambda s: s.join(DoctorBranch, DoctorBranch.doctor_id == Doctor.id).where(
             and_(
                 DoctorBranch.branch_id == branch_id,
                 DoctorBranch.is_active == True
             )
-        )
+        ))
+    
+    for criterion in criteria:
+        stmt += criterion
+        count_stmt += criterion
     
     # Get total count
-    total = query.count()
+    total = db.execute(count_stmt).scalar_one()
     
     # Apply pagination
-    doctors = query.order_by(desc(Doctor.created_at)).offset(skip).limit(limit).all()
+    stmt += lambda s: s.order_by(desc(Doctor.created_at)).offset(skip).limit(limit)
+    rows = db.execute(stmt).all()
+    
+    # Rows come straight from the doctors table, so build the models without re-validating
+    doctors = [DoctorResponse.model_construct(**row._mapping) for row in rows]
     
     # Calculate pagination
     total_pages = (total + limit - 1) // limit
@@ -301,7 +336,12 @@ def get_doctor(
     db: Session = Depends(get_db)
 ):
     """Get doctor details by ID"""
-    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    # Branch assignments and their branches arrive with the doctor, not one query per assignment
+    doctor = db.get(
+        Doctor,
+        doctor_id,
+        options=[selectinload(Doctor.branches).joinedload(DoctorBranch.branch)]
+    )
     
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
@@ -327,6 +367,7 @@ def get_doctor(
 def update_doctor(
     doctor_id: int,
     doctor_data: DoctorUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_staff),
     db: Session = Depends(get_db)
 ):
@@ -344,6 +385,8 @@ def update_doctor(
     db.commit()
     db.refresh(doctor)
     
+    background_tasks.add_task(cache.invalidate_doctor_specializations)
+    
     # Log activity
     auth_guard.log_activity(
         db=db,
@@ -360,33 +403,41 @@ def update_doctor(
 @router.delete("/doctors/{doctor_id}")
 def deactivate_doctor(
     doctor_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_staff),
     db: Session = Depends(get_db)
 ):
     """Deactivate a doctor"""
-    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    doctor = db.get(Doctor, doctor_id)
     
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
+    doctor_name = f"{doctor.first_name} {doctor.last_name}"
+    
     # Deactivate doctor
     doctor.is_active = False
-    db.commit()
     
-    # Deactivate all branch assignments
-    for db_branch in doctor.branches:
-        db_branch.is_active = False
+    # Deactivate all branch assignments in one UPDATE, same transaction
+    db.execute(
+        update(DoctorBranch)
+        .where(DoctorBranch.doctor_id == doctor_id, DoctorBranch.is_active == True)
+        .values(is_active=False)
+        .execution_options(synchronize_session=False)
+    )
     
     db.commit()
     
+    background_tasks.add_task(cache.invalidate_doctor_specializations)
+    
     # Log activity
     auth_guard.log_activity(
         db=db,
         user=current_user,
         action="deactivate",
         entity_type="doctor",
-        entity_id=doctor.id,
-        description=f"Deactivated doctor {doctor.first_name} {doctor.last_name}"
+        entity_id=doctor_id,
+        description=f"Deactivated doctor {doctor_name}"
     )
     
     return {"message": "Doctor deactivated successfully"}
@@ -590,12 +641,8 @@ def search_doctors_city_wide(
     return {"doctors": result, "total": len(result)}
 
 
-@router.get("/specializations")
-def get_specializations(
-    current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
-):
-    """Get list of all specializations"""
+def _specialization_counts(db: Session) -> list:
+    """Active doctor count per specialization"""
     specializations = db.query(
         Doctor.specialization,
         func.count(Doctor.id).label("doctor_count")
@@ -609,6 +656,22 @@ def get_specializations(
     ]
 
 
+@router.get("/specializations")
+async def get_specializations(
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """Get list of all specializations"""
+    # Reference data for every doctor picker; doctor writes clear the cache
+    cached = await cache.get_doctor_specializations()
+    if cached is not None:
+        return cached
+    
+    specializations = await run_in_threadpool(_specialization_counts, db)
+    await cache.set_doctor_specializations(specializations)
+    return specializations
+
+
 # ============ Doctor Portal Authentication ============
 
 @router.post("/doctors/{doctor_id}/generate-portal-access")
@@ -659,14 +722,8 @@ def generate_doctor_portal_access(
     }
 
 
-@router.get("/doctors/{doctor_id}/portal-dashboard")
-def get_doctor_portal_dashboard(
-    doctor_id: int,
-    days: int = Query(30, ge=1, le=365),
-    current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
-):
-    """Get dashboard data for doctor portal"""
+def _build_portal_dashboard(db: Session, doctor_id: int, days: int) -> dict:
+    """Compute the doctor portal dashboard payload"""
     doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
     
     if not doctor:
@@ -676,25 +733,10 @@ def get_doctor_portal_dashboard(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     
-    # Get branch IDs doctor is assigned to
-    branch_ids = [db.branch_id for db in doctor.branches if db.is_active]
-    
-    # Get received reports count
-    received_reports = db.query(func.count(ReportDistribution.id)).filter(
-        and_(
-            ReportDistribution.doctor_id == doctor_id,
-            ReportDistribution.created_at >= start_date,
-            ReportDistribution.created_at <= end_date
-        )
-    ).scalar()
-    
-    # Get unread reports count
-    unread_reports = db.query(func.count(ReportDistribution.id)).filter(
-        and_(
-            ReportDistribution.doctor_id == doctor_id,
-            ReportDistribution.delivery_status.in_(["pending", "sent", "delivered"])
-        )
-    ).scalar()
+    # Get received and unread report counts
+    counts = doctor_report_counts(db, doctor_id, start_date)
+    received_reports = counts["received"]
+    unread_reports = counts["unread"]
     
     # Get reports by type
     reports_by_type = db.query(
@@ -704,12 +746,21 @@ def get_doctor_portal_dashboard(
         ReportDistribution.doctor_id == doctor_id
     ).group_by(ReportDistribution.report_type).all()
     
-    # Get recent reports
-    recent_reports = db.query(ReportDistribution).filter(
+    # Get recent reports (plain columns, patient name joined in)
+    recent_reports = db.query(
+        ReportDistribution.id,
+        ReportDistribution.distribution_id,
+        Patient.first_name.label("patient_name"),
+        ReportDistribution.report_type,
+        ReportDistribution.delivery_status,
+        ReportDistribution.created_at
+    ).outerjoin(
+        Patient, Patient.id == ReportDistribution.patient_id
+    ).filter(
         ReportDistribution.doctor_id == doctor_id
     ).order_by(desc(ReportDistribution.created_at)).limit(10).all()
     
-    return {
+    return jsonable_encoder({
         "doctor": {
             "id": doctor.id,
             "name": f"Dr. {doctor.first_name} {doctor.last_name}",
@@ -725,14 +776,7 @@ def get_doctor_portal_dashboard(
             for rpt_type, count in reports_by_type
         ],
         "recent_reports": [
-            {
-                "id": r.id,
-                "distribution_id": r.distribution_id,
-                "patient_name": r.lab_result.patient.first_name if r.lab_result and r.lab_result.patient else "N/A",
-                "report_type": r.report_type,
-                "delivery_status": r.delivery_status,
-                "created_at": r.created_at
-            }
+            {**r._mapping, "patient_name": r.patient_name or "N/A"}
             for r in recent_reports
         ],
         "assigned_branches": [
@@ -742,7 +786,24 @@ def get_doctor_portal_dashboard(
             }
             for db in doctor.branches if db.is_active
         ]
-    }
+    })
+
+
+@router.get("/doctors/{doctor_id}/portal-dashboard")
+async def get_doctor_portal_dashboard(
+    doctor_id: int,
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """Get dashboard data for doctor portal"""
+    cached = await cache.get_doctor_dashboard(doctor_id, days)
+    if cached is not None:
+        return cached
+    
+    dashboard = await run_in_threadpool(_build_portal_dashboard, db, doctor_id, days)
+    await cache.set_doctor_dashboard(doctor_id, days, dashboard)
+    return dashboard
 
 
 # ============ Analytics ============
@@ -1,17 +1,10 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.utils.database import SessionLocal
+from app.utils.database import get_db
 from app.models.expense_entry import ExpenseEntry
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/expenses/")
 def create_expense(amount: float, category: str, calendar_day_id: int, notes: str = "", db: Session = Depends(get_db)):
     expense = ExpenseEntry(amount=amount, category=category, calendar_day_id=calendar_day_id, notes=notes)
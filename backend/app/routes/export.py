@@ -1,46 +1,89 @@
 from fastapi import APIRouter, Depends, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.utils.database import get_db
+from app.utils.database import get_db, SessionLocal
 from app.models.invoice import Invoice
 import csv
 import io
-import json
+import orjson
 
 router = APIRouter()
 
 @router.get("/export/invoices/csv")
-def export_invoices_csv(db: Session = Depends(get_db)):
-    invoices = db.query(Invoice).all()
+def export_invoices_csv():
+    stmt = select(
+        Invoice.id,
+        Invoice.patient_id,
+        Invoice.branch_id,
+        Invoice.total_amount,
+        Invoice.status,
+        Invoice.created_at
+    ).order_by(Invoice.id).execution_options(yield_per=1000)
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["ID", "Patient ID", "Branch ID", "Amount", "Status", "Created At"])
+    # The body streams after the request's dependencies are torn down, so the
+    # generator owns its session for as long as it reads
+    def generate():
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(["ID", "Patient ID", "Branch ID", "Amount", "Status", "Created At"])
+        yield output.getvalue()
 
-    for invoice in invoices:
-        writer.writerow([
-            invoice.id,
-            invoice.patient_id,
-            invoice.branch_id,
-            invoice.total_amount,
-            invoice.status,
-            invoice.created_at
-        ])
+        db = SessionLocal()
+        try:
+            for partition in db.execute(stmt).partitions():
+                output.seek(0)
+                output.truncate()
+                writer.writerows(partition)
+                yield output.getvalue()
+        finally:
+            db.close()
 
-    return Response(content=output.getvalue(), media_type="text/csv")
+    return StreamingResponse(
+        generate(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=invoices.csv"}
+    )
 
 
 @router.get("/export/invoices/json")
 def export_invoices_json(db: Session = Depends(get_db)):
-    invoices = db.query(Invoice).all()
-    data = [
-        {
-            "id": i.id,
-            "patient_id": i.patient_id,
-            "branch_id": i.branch_id,
-            "total_amount": i.total_amount,
-            "status": i.status,
-            "created_at": str(i.created_at)
-        }
-        for i in invoices
-    ]
-    return Response(content=json.dumps(data), media_type="application/json")
\ No newline at end of file
+    rows = db.execute(
+        select(
+            Invoice.id,
+            Invoice.patient_id,
+            Invoice.branch_id,
+            Invoice.total_amount,
+            Invoice.status,
+            Invoice.created_at
+        ).order_by(Invoice.id)
+    ).mappings().all()
+    return Response(
+        content=orjson.dumps([dict(row) for row in rows]),
+        media_type="application/json"
+    )
+
+
+@router.get("/export/invoices/ndjson")
+def export_invoices_ndjson():
+    stmt = select(
+        Invoice.id,
+        Invoice.patient_id,
+        Invoice.branch_id,
+        Invoice.total_amount,
+        Invoice.status,
+        Invoice.created_at
+    ).order_by(Invoice.id).execution_options(yield_per=1000)
+
+    # One JSON object per line, encoded a batch at a time, so memory stays
+    # bounded by the batch size rather than the table size. Like the CSV export,
+    # the generator owns its session since the body streams after teardown
+    def generate():
+        db = SessionLocal()
+        try:
+            for partition in db.execute(stmt).mappings().partitions():
+                yield b"".join(orjson.dumps(dict(row)) + b"\n" for row in partition)
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Response, BackgroundTasks
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from typing import Optional
@@ -14,9 +14,15 @@ from app.utils.excel_export import export_service
 
 router = APIRouter()
 
+def ensure_branch_exists(db: Session, branch_id: int):
+    """Raise 404 unless the branch exists (selects only the id)"""
+    if db.query(Branch.id).filter(Branch.id == branch_id).scalar() is None:
+        raise HTTPException(status_code=404, detail="Branch not found")
+
 @router.post("/export/monthly-report", response_model=ExportResponse)
 def export_monthly_report(
     request: MonthlyReportRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_staff),
     db: Session = Depends(get_db)
 ):
@@ -27,14 +33,14 @@ def export_monthly_report(
     if current_user.role != 'super_admin':
         branch_id = current_user.branch_id
     elif branch_id:
-        # Verify branch exists and user has access if not super admin
-        branch = db.query(Branch).filter(Branch.id == branch_id).first()
-        if not branch:
-            raise HTTPException(status_code=404, detail="Branch not found")
-    
-    # Generate report
-    result = export_service.generate_monthly_patient_report(
-        db=db,
+        ensure_branch_exists(db, branch_id)
+    
+    # Queue report generation; poll /export/job/{job_id} for the file
+    job_id = export_service.new_job_id(f"vaidya_vihar_monthly_report_{request.year}_{request.month:02d}")
+    background_tasks.add_task(
+        export_service.run_job,
+        export_service.generate_monthly_patient_report,
+        job_id,
         year=request.year,
         month=request.month,
         branch_id=branch_id,
@@ -50,12 +56,13 @@ def export_monthly_report(
         description=f"Generated monthly report for {request.year}-{request.month:02d}"
     )
     
-    return result
+    return export_service.job_status(job_id)
 
-@router.post("/export/staff-attendance")
+@router.post("/export/staff-attendance", response_model=ExportResponse)
 def export_staff_attendance(
     year: int,
     month: int,
+    background_tasks: BackgroundTasks,
     branch_id: Optional[int] = None,
     current_user: User = Depends(require_staff),
     db: Session = Depends(get_db)
@@ -66,13 +73,14 @@ def export_staff_attendance(
     if current_user.role != 'super_admin':
         branch_id = current_user.branch_id
     elif branch_id:
-        branch = db.query(Branch).filter(Branch.id == branch_id).first()
-        if not branch:
-            raise HTTPException(status_code=404, detail="Branch not found")
-    
-    # Generate report
-    result = export_service.generate_staff_attendance_report(
-        db=db,
+        ensure_branch_exists(db, branch_id)
+    
+    # Queue report generation; poll /export/job/{job_id} for the file
+    job_id = export_service.new_job_id(f"vaidya_vihar_staff_attendance_{year}_{month:02d}")
+    background_tasks.add_task(
+        export_service.run_job,
+        export_service.generate_staff_attendance_report,
+        job_id,
         year=year,
         month=month,
         branch_id=branch_id
@@ -87,10 +95,11 @@ def export_staff_attendance(
         description=f"Generated staff attendance report for {year}-{month:02d}"
     )
     
-    return result
+    return export_service.job_status(job_id)
 
-@router.post("/export/inventory")
+@router.post("/export/inventory", response_model=ExportResponse)
 def export_inventory_report(
+    background_tasks: BackgroundTasks,
     branch_id: Optional[int] = None,
     current_user: User = Depends(require_staff),
     db: Session = Depends(get_db)
@@ -101,13 +110,14 @@ def export_inventory_report(
     if current_user.role != 'super_admin':
         branch_id = current_user.branch_id
     elif branch_id:
-        branch = db.query(Branch).filter(Branch.id == branch_id).first()
-        if not branch:
-            raise HTTPException(status_code=404, detail="Branch not found")
-    
-    # Generate report
-    result = export_service.generate_inventory_report(
-        db=db,
+        ensure_branch_exists(db, branch_id)
+    
+    # Queue report generation; poll /export/job/{job_id} for the file
+    job_id = export_service.new_job_id(f"vaidya_vihar_inventory_report_{datetime.now().strftime('%Y%m%d')}")
+    background_tasks.add_task(
+        export_service.run_job,
+        export_service.generate_inventory_report,
+        job_id,
         branch_id=branch_id
     )
     
@@ -120,7 +130,15 @@ def export_inventory_report(
         description="Generated inventory report"
     )
     
-    return result
+    return export_service.job_status(job_id)
+
+@router.get("/export/job/{job_id}", response_model=ExportResponse)
+def get_export_job(
+    job_id: str,
+    current_user: User = Depends(require_staff)
+):
+    """Get status of a queued export"""
+    return export_service.job_status(job_id)
 
 @router.get("/export/download/{filename}")
 def download_report(
@@ -147,10 +165,13 @@ def download_report(
         description=f"Downloaded report file: {filename}"
     )
     
+    # Pass the stat result up front so Content-Length is set without a second stat;
+    # the body is sent with sendfile when the server supports it
     return FileResponse(
         path=filepath,
         filename=filename,
-        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        stat_result=os.stat(filepath)
     )
 
 @router.delete("/export/cleanup")
@@ -187,9 +208,10 @@ def get_export_status(
             file_count = 0
             total_size = 0
         else:
-            files = [f for f in os.listdir(export_dir) if f.endswith('.xlsx')]
+            with os.scandir(export_dir) as it:
+                files = [entry for entry in it if entry.name.endswith('.xlsx') and entry.is_file()]
             file_count = len(files)
-            total_size = sum(os.path.getsize(os.path.join(export_dir, f)) for f in files)
+            total_size = sum(entry.stat().st_size for entry in files)
         
         return {
             "export_directory": export_dir,
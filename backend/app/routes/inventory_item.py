@@ -1,17 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from app.utils.database import SessionLocal
+from app.utils.database import get_db
 from app.models.inventory_item import InventoryItem
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/inventory/")
 def add_item(name: str, category: str, unit: str, quantity: float, threshold: float, db: Session = Depends(get_db)):
     item = InventoryItem(name=name, category=category, unit=unit, quantity=quantity, threshold=threshold)
@@ -26,13 +20,24 @@ def list_items(db: Session = Depends(get_db)):
 
 @router.put("/inventory/{item_id}/update-stock/")
 def update_stock(item_id: int, quantity: float, db: Session = Depends(get_db)):
-    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
-    if not item:
+    # Increment in the database so concurrent updates cannot overwrite each other
+    new_quantity = db.execute(
+        update(InventoryItem)
+        .where(InventoryItem.id == item_id)
+        .values(quantity=InventoryItem.quantity + quantity)
+        .returning(InventoryItem.quantity)
+    ).scalar_one_or_none()
+    if new_quantity is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    item.quantity += quantity
     db.commit()
-    return {"message": "Stock updated", "new_quantity": item.quantity}
+    return {"message": "Stock updated", "new_quantity": new_quantity}
 @router.get("/inventory/low-stock/")
 def get_low_stock_items(db: Session = Depends(get_db)):
-    items = db.query(InventoryItem).filter(InventoryItem.quantity < InventoryItem.threshold).all()
-    return items
+    items = db.query(
+        InventoryItem.id,
+        InventoryItem.name,
+        InventoryItem.unit,
+        InventoryItem.quantity,
+        InventoryItem.threshold
+    ).filter(InventoryItem.quantity < InventoryItem.threshold).all()
+    return [dict(item._mapping) for item in items]
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import load_only, raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, desc, tuple_, select, update, insert, values, column, case, Integer, Boolean
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
+from threading import Lock
+from cachetools import TTLCache
 from datetime import datetime, timedelta
 
-from app.utils.database import get_db
+from app.utils.database import get_async_db
 from app.utils.auth_system import auth_guard, require_staff, get_current_user
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, set_next_cursor
+from app.services.redis_cache import cache
 from app.models import User, Branch, InventoryItem, StockMovement
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 # Pydantic models for inventory
 class InventoryItemCreate(BaseModel):
@@ -75,8 +82,7 @@ class InventoryItemResponse(BaseModel):
     expiry_status: Optional[str]
     total_value: float
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
 
 class StockMovementCreate(BaseModel):
     movement_type: str = Field(..., pattern=r"^(purchase|consumption|wastage|adjustment)$")
@@ -84,6 +90,12 @@ class StockMovementCreate(BaseModel):
     reference_number: Optional[str] = Field(None, max_length=100)
     notes: Optional[str] = None
 
+class BulkStockMovementItem(StockMovementCreate):
+    item_id: int
+
+class BulkStockMovementCreate(BaseModel):
+    movements: List[BulkStockMovementItem] = Field(..., min_length=1, max_length=500)
+
 class StockMovementResponse(BaseModel):
     id: int
     inventory_item_id: int
@@ -101,16 +113,51 @@ class StockMovementResponse(BaseModel):
     item_name: str
     item_code: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore', frozen=True)
+
+# Validates/serializes a whole page in one call instead of per-row models
+InventoryItemListAdapter = TypeAdapter(List[InventoryItemResponse])
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Category dropdowns are polled constantly but only change when items are
+# created or edited: cache per branch and clear on those writes
+_categories_cache = TTLCache(maxsize=64, ttl=300)
+_categories_lock = Lock()
 
-router = APIRouter()
+def invalidate_categories_cache():
+    with _categories_lock:
+        _categories_cache.clear()
+
+DEFAULT_LISTING_LIMIT = 100
+
+async def _get_item_or_403(db: AsyncSession, user: User, item_id: int, *options) -> InventoryItem:
+    """Fetch an item by primary key (identity map first) and enforce branch access"""
+    item = await db.get(InventoryItem, item_id, options=[*options, raiseload("*")])
+    
+    if not item:
+        raise HTTPException(status_code=404, detail="Inventory item not found")
+    
+    # Check branch access
+    if user.role != 'super_admin' and item.branch_id != user.branch_id:
+        raise HTTPException(status_code=403, detail="Access denied to this item")
+    
+    return item
+
+def _movement_delta(movement_data: StockMovementCreate) -> int:
+    """Signed stock change for a movement"""
+    if movement_data.movement_type == "purchase":
+        return abs(movement_data.quantity)
+    if movement_data.movement_type in ("consumption", "wastage"):
+        return -abs(movement_data.quantity)
+    return movement_data.quantity  # adjustment
 
 @router.post("/inventory/items/", response_model=InventoryItemResponse)
-def create_inventory_item(
+async def create_inventory_item(
     item_data: InventoryItemCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new inventory item"""
     
@@ -118,20 +165,6 @@ def create_inventory_item(
     if current_user.role != 'super_admin':
         item_data.branch_id = current_user.branch_id
     
-    # Check for duplicate item code
-    existing_item = db.query(InventoryItem).filter(
-        and_(
-            InventoryItem.item_code == item_data.item_code,
-            InventoryItem.branch_id == item_data.branch_id
-        )
-    ).first()
-    
-    if existing_item:
-        raise HTTPException(
-            status_code=400,
-            detail="Item with this code already exists in this branch"
-        )
-    
     # Create inventory item
     db_item = InventoryItem(
         branch_id=item_data.branch_id,
@@ -154,14 +187,25 @@ def create_inventory_item(
         last_restocked=datetime.utcnow() if item_data.current_stock > 0 else None
     )
     
+    # Duplicate item codes are rejected by the uq_inv_branch_code constraint
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Item with this code already exists in this branch"
+        )
+    await db.refresh(db_item)
+    
+    invalidate_categories_cache()
+    background_tasks.add_task(cache.invalidate_inventory_listing, db_item.branch_id)
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=current_user.id,
         action="create",
         entity_type="inventory_item",
         entity_id=db_item.id,
@@ -170,27 +214,34 @@ def create_inventory_item(
     
     return db_item
 
-@router.get("/inventory/items/", response_model=List[InventoryItemResponse])
-def get_inventory_items(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    search: Optional[str] = Query(None),
-    category: Optional[str] = Query(None),
-    branch_id: Optional[int] = Query(None),
-    low_stock_only: bool = Query(False),
-    expired_only: bool = Query(False),
-    current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
-):
-    """Get inventory items with filtering and search"""
+async def _list_inventory_items(
+    db: AsyncSession,
+    current_user: User,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    search: Optional[str],
+    category: Optional[str],
+    branch_id: Optional[int],
+    low_stock_only: bool,
+    expired_only: bool
+) -> List[InventoryItemResponse]:
+    """Run the inventory list query for one page"""
+    
+    # Item columns plus the calculated fields, as flat rows
+    query = select(
+        *InventoryItem.__table__.columns,
+        InventoryItem.stock_status.label("stock_status"),
+        InventoryItem.expiry_status.label("expiry_status"),
+        InventoryItem.total_value.label("total_value")
+    )
     
     # Filter by branch access
     if current_user.role == 'super_admin':
-        query = db.query(InventoryItem)
         if branch_id:
-            query = query.filter(InventoryItem.branch_id == branch_id)
+            query = query.where(InventoryItem.branch_id == branch_id)
     else:
-        query = db.query(InventoryItem).filter(InventoryItem.branch_id == current_user.branch_id)
+        query = query.where(InventoryItem.branch_id == current_user.branch_id)
     
     # Search functionality
     if search:
@@ -199,142 +250,125 @@ def get_inventory_items(
             InventoryItem.item_name.ilike(f"%{search}%"),
             InventoryItem.supplier.ilike(f"%{search}%")
         )
-        query = query.filter(search_filter)
+        query = query.where(search_filter)
     
     # Category filter
     if category:
-        query = query.filter(InventoryItem.category == category)
+        query = query.where(InventoryItem.category == category)
     
     # Only active items
-    query = query.filter(InventoryItem.is_active == True)
-    
-    items = query.order_by(desc(InventoryItem.item_name)).offset(skip).limit(limit).all()
-    
-    # Add calculated fields
-    enriched_items = []
-    for item in items:
-        # Calculate stock status
-        if item.current_stock <= 0:
-            stock_status = "Out of Stock"
-        elif item.current_stock <= item.minimum_stock:
-            stock_status = "Low Stock"
-        elif item.current_stock >= item.maximum_stock:
-            stock_status = "Overstocked"
-        else:
-            stock_status = "Normal"
-        
-        # Calculate expiry status
-        expiry_status = None
-        if item.expiry_date:
-            days_to_expiry = (item.expiry_date - datetime.now()).days
-            if days_to_expiry < 0:
-                expiry_status = "Expired"
-            elif days_to_expiry <= 30:
-                expiry_status = "Expiring Soon"
-            else:
-                expiry_status = "Valid"
-        
-        # Calculate total value
-        total_value = item.current_stock * item.purchase_price
-        
-        # Create response with additional fields
-        item_dict = {
-            **item.__dict__,
-            'stock_status': stock_status,
-            'expiry_status': expiry_status,
-            'total_value': total_value
-        }
-        enriched_items.append(InventoryItemResponse(**item_dict))
+    query = query.where(InventoryItem.is_active == True)
     
-    # Apply additional filters
+    # Status filters run in SQL so they apply before pagination
     if low_stock_only:
-        enriched_items = [item for item in enriched_items if item.stock_status in ["Low Stock", "Out of Stock"]]
+        query = query.where(
+            or_(InventoryItem.current_stock <= 0, InventoryItem.current_stock <= InventoryItem.minimum_stock)
+        )
     
     if expired_only:
-        enriched_items = [item for item in enriched_items if item.expiry_status in ["Expired", "Expiring Soon"]]
+        # Matches expiry_status "Expired"/"Expiring Soon": (expiry_date - now).days <= 30
+        query = query.where(InventoryItem.expiry_date < datetime.now() + timedelta(days=31))
     
-    return enriched_items
+    query = query.order_by(desc(InventoryItem.item_name), desc(InventoryItem.id))
+    
+    # Keyset pagination when a cursor is given; skip stays for existing clients
+    if cursor:
+        last_name, last_id = decode_cursor(cursor, str, int)
+        query = query.where(tuple_(InventoryItem.item_name, InventoryItem.id) < tuple_(last_name, last_id))
+    else:
+        query = query.offset(skip)
+    
+    rows = (await db.execute(query.limit(limit))).all()
+    
+    return InventoryItemListAdapter.validate_python(rows, from_attributes=True)
 
-@router.get("/inventory/items/{item_id}", response_model=InventoryItemResponse)
-def get_inventory_item(
-    item_id: int,
+@router.get("/inventory/items/", response_model=List[InventoryItemResponse])
+async def get_inventory_items(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_LISTING_LIMIT, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    search: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    branch_id: Optional[int] = Query(None),
+    low_stock_only: bool = Query(False),
+    expired_only: bool = Query(False),
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get inventory item by ID"""
+    """Get inventory items with filtering and search"""
     
-    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+    # The unfiltered first page is what dashboards poll: serve it from a
+    # short-lived Redis entry per branch, cleared by inventory writes
+    is_default_listing = (
+        skip == 0 and limit == DEFAULT_LISTING_LIMIT and not cursor and not search
+        and not category and not low_stock_only and not expired_only
+    )
+    if current_user.role != 'super_admin':
+        listing_scope = current_user.branch_id
+    else:
+        listing_scope = branch_id or "all"
     
-    if not item:
-        raise HTTPException(status_code=404, detail="Inventory item not found")
+    if is_default_listing:
+        cached = await cache.get_inventory_listing(listing_scope)
+        if cached is not None:
+            headers = {NEXT_CURSOR_HEADER: cached["next_cursor"]} if cached["next_cursor"] else None
+            return ORJSONResponse(content=cached["items"], headers=headers)
     
-    # Check branch access
-    if current_user.role != 'super_admin' and item.branch_id != current_user.branch_id:
-        raise HTTPException(status_code=403, detail="Access denied to this item")
+    items = await _list_inventory_items(
+        db, current_user, skip, limit, cursor,
+        search, category, branch_id, low_stock_only, expired_only
+    )
+    next_cursor = set_next_cursor(response, items, limit, "item_name", "id")
+    payload = InventoryItemListAdapter.dump_python(items, mode="json")
     
-    # Calculate stock status
-    if item.current_stock <= 0:
-        stock_status = "Out of Stock"
-    elif item.current_stock <= item.minimum_stock:
-        stock_status = "Low Stock"
-    elif item.current_stock >= item.maximum_stock:
-        stock_status = "Overstocked"
-    else:
-        stock_status = "Normal"
-    
-    # Calculate expiry status
-    expiry_status = None
-    if item.expiry_date:
-        days_to_expiry = (item.expiry_date - datetime.now()).days
-        if days_to_expiry < 0:
-            expiry_status = "Expired"
-        elif days_to_expiry <= 30:
-            expiry_status = "Expiring Soon"
-        else:
-            expiry_status = "Valid"
-    
-    # Calculate total value
-    total_value = item.current_stock * item.purchase_price
-    
-    # Create response with additional fields
-    item_dict = {
-        **item.__dict__,
-        'stock_status': stock_status,
-        'expiry_status': expiry_status,
-        'total_value': total_value
-    }
+    if is_default_listing:
+        await cache.set_inventory_listing(
+            listing_scope, {"items": payload, "next_cursor": next_cursor}
+        )
+    
+    # Already validated and dumped, so bypass response_model re-serialization
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return ORJSONResponse(content=payload, headers=headers)
+
+@router.get("/inventory/items/{item_id}", response_model=InventoryItemResponse)
+async def get_inventory_item(
+    item_id: int,
+    current_user: User = Depends(require_staff),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get inventory item by ID"""
     
-    return InventoryItemResponse(**item_dict)
+    item = await _get_item_or_403(db, current_user, item_id)
+    
+    return InventoryItemResponse.model_validate(item)
 
 @router.put("/inventory/items/{item_id}", response_model=InventoryItemResponse)
-def update_inventory_item(
+async def update_inventory_item(
     item_id: int,
     item_data: InventoryItemUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update inventory item"""
     
-    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
-    
-    if not item:
-        raise HTTPException(status_code=404, detail="Inventory item not found")
-    
-    # Check branch access
-    if current_user.role != 'super_admin' and item.branch_id != current_user.branch_id:
-        raise HTTPException(status_code=403, detail="Access denied to this item")
+    item = await _get_item_or_403(db, current_user, item_id)
     
     # Update fields
     for field, value in item_data.dict(exclude_unset=True).items():
         setattr(item, field, value)
     
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await db.refresh(item)
+    
+    invalidate_categories_cache()
+    background_tasks.add_task(cache.invalidate_inventory_listing, item.branch_id)
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=current_user.id,
         action="update",
         entity_type="inventory_item",
         entity_id=item.id,
@@ -344,202 +378,347 @@ def update_inventory_item(
     return item
 
 @router.delete("/inventory/items/{item_id}")
-def deactivate_inventory_item(
+async def deactivate_inventory_item(
     item_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Deactivate inventory item (soft delete)"""
     
-    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
-    
-    if not item:
-        raise HTTPException(status_code=404, detail="Inventory item not found")
-    
-    # Check branch access
-    if current_user.role != 'super_admin' and item.branch_id != current_user.branch_id:
-        raise HTTPException(status_code=403, detail="Access denied to this item")
+    # Only the columns this handler reads
+    item = await _get_item_or_403(
+        db, current_user, item_id,
+        load_only(InventoryItem.id, InventoryItem.branch_id, InventoryItem.item_name, InventoryItem.is_active)
+    )
     
-    # Deactivate item
+    # Deactivate item; keep the name so the log doesn't reload the expired row
+    item_name = item.item_name
+    branch_id = item.branch_id
     item.is_active = False
-    db.commit()
+    await db.commit()
+    
+    background_tasks.add_task(cache.invalidate_inventory_listing, branch_id)
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=current_user.id,
         action="deactivate",
         entity_type="inventory_item",
-        entity_id=item.id,
-        description=f"Deactivated inventory item {item.item_name}"
+        entity_id=item_id,
+        description=f"Deactivated inventory item {item_name}"
     )
     
     return {"message": "Inventory item deactivated successfully"}
 
 @router.post("/inventory/items/{item_id}/stock-movement", response_model=StockMovementResponse)
-def create_stock_movement(
+async def create_stock_movement(
     item_id: int,
     movement_data: StockMovementCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create stock movement (purchase, consumption, adjustment)"""
     
-    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
-    
-    if not item:
-        raise HTTPException(status_code=404, detail="Inventory item not found")
+    # Calculate stock change based on movement type
+    delta = _movement_delta(movement_data)
     
-    # Check branch access
-    if current_user.role != 'super_admin' and item.branch_id != current_user.branch_id:
-        raise HTTPException(status_code=403, detail="Access denied to this item")
+    # Apply the change atomically; the WHERE clause enforces branch access and
+    # keeps stock from going negative even under concurrent movements
+    values = {"current_stock": InventoryItem.current_stock + delta}
+    if movement_data.movement_type == "purchase":
+        values["last_restocked"] = datetime.utcnow()
+    
+    stmt = (
+        update(InventoryItem)
+        .where(InventoryItem.id == item_id, InventoryItem.current_stock + delta >= 0)
+        .values(**values)
+        .returning(
+            InventoryItem.id,
+            InventoryItem.branch_id,
+            InventoryItem.current_stock,
+            InventoryItem.item_name,
+            InventoryItem.item_code
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if current_user.role != 'super_admin':
+        stmt = stmt.where(InventoryItem.branch_id == current_user.branch_id)
     
-    # Store previous stock
-    previous_stock = item.current_stock
+    item = (await db.execute(stmt)).first()
     
-    # Calculate new stock based on movement type
-    if movement_data.movement_type == "purchase":
-        new_stock = previous_stock + abs(movement_data.quantity)
-        item.last_restocked = datetime.utcnow()
-    elif movement_data.movement_type == "consumption":
-        new_stock = previous_stock - abs(movement_data.quantity)
-    elif movement_data.movement_type == "wastage":
-        new_stock = previous_stock - abs(movement_data.quantity)
-    else:  # adjustment
-        new_stock = previous_stock + movement_data.quantity
-    
-    # Validate stock doesn't go negative
-    if new_stock < 0:
+    if not item:
+        # Nothing updated: work out which check failed
+        existing_branch_id = await db.scalar(
+            select(InventoryItem.branch_id).where(InventoryItem.id == item_id)
+        )
+        if existing_branch_id is None:
+            raise HTTPException(status_code=404, detail="Inventory item not found")
+        if current_user.role != 'super_admin' and existing_branch_id != current_user.branch_id:
+            raise HTTPException(status_code=403, detail="Access denied to this item")
         raise HTTPException(
             status_code=400,
             detail="Stock cannot go negative"
         )
     
-    # Update item stock
-    item.current_stock = new_stock
-    
-    # Create stock movement record
-    stock_movement = StockMovement(
-        inventory_item_id=item_id,
-        movement_type=movement_data.movement_type,
-        quantity=movement_data.quantity,
-        previous_stock=previous_stock,
-        new_stock=new_stock,
-        reference_number=movement_data.reference_number,
-        notes=movement_data.notes,
-        created_by=current_user.id
-    )
+    new_stock = item.current_stock
+    
+    # Create stock movement record in the same transaction
+    stock_movement = (await db.execute(
+        insert(StockMovement).values(
+            inventory_item_id=item_id,
+            movement_type=movement_data.movement_type,
+            quantity=movement_data.quantity,
+            previous_stock=new_stock - delta,
+            new_stock=new_stock,
+            reference_number=movement_data.reference_number,
+            notes=movement_data.notes,
+            created_by=current_user.id
+        ).returning(*StockMovement.__table__.columns)
+    )).one()
+    
+    await db.commit()
     
-    db.add(stock_movement)
-    db.commit()
-    db.refresh(stock_movement)
+    background_tasks.add_task(cache.invalidate_inventory_listing, item.branch_id)
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=current_user.id,
         action="stock_movement",
         entity_type="inventory_item",
         entity_id=item.id,
         description=f"Stock movement for {item.item_name}: {movement_data.movement_type} {movement_data.quantity}"
     )
     
-    return stock_movement
+    return StockMovementResponse.model_construct(
+        **stock_movement._mapping,
+        item_name=item.item_name,
+        item_code=item.item_code
+    )
+
+@router.post("/inventory/stock-movements/bulk", response_model=List[StockMovementResponse])
+async def create_stock_movements_bulk(
+    bulk_data: BulkStockMovementCreate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(require_staff),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Apply several stock movements with one UPDATE and one INSERT"""
+    
+    movements = bulk_data.movements
+    deltas = [_movement_delta(movement) for movement in movements]
+    
+    # Net change per item, so an item listed twice is updated once
+    item_deltas = {}
+    restocked = set()
+    for movement, delta in zip(movements, deltas):
+        item_deltas[movement.item_id] = item_deltas.get(movement.item_id, 0) + delta
+        if movement.movement_type == "purchase":
+            restocked.add(movement.item_id)
+    
+    changes = values(
+        column("id", Integer), column("delta", Integer), column("restocked", Boolean),
+        name="changes"
+    ).data([(item_id, delta, item_id in restocked) for item_id, delta in item_deltas.items()])
+    
+    # Same checks as the single-item endpoint, applied per row of the VALUES list
+    stmt = (
+        update(InventoryItem)
+        .where(InventoryItem.id == changes.c.id, InventoryItem.current_stock + changes.c.delta >= 0)
+        .values(
+            current_stock=InventoryItem.current_stock + changes.c.delta,
+            last_restocked=case((changes.c.restocked, datetime.utcnow()), else_=InventoryItem.last_restocked)
+        )
+        .returning(
+            InventoryItem.id,
+            InventoryItem.branch_id,
+            InventoryItem.current_stock,
+            InventoryItem.item_name,
+            InventoryItem.item_code
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if current_user.role != 'super_admin':
+        stmt = stmt.where(InventoryItem.branch_id == current_user.branch_id)
+    
+    items = {item.id: item for item in (await db.execute(stmt)).all()}
+    
+    if len(items) != len(item_deltas):
+        # Some item was not updated: undo the rest and report the first failure
+        await db.rollback()
+        item_branches = dict((await db.execute(
+            select(InventoryItem.id, InventoryItem.branch_id).where(InventoryItem.id.in_(item_deltas))
+        )).all())
+        for item_id in item_deltas:
+            if item_id not in item_branches:
+                raise HTTPException(status_code=404, detail=f"Inventory item {item_id} not found")
+            if current_user.role != 'super_admin' and item_branches[item_id] != current_user.branch_id:
+                raise HTTPException(status_code=403, detail=f"Access denied to item {item_id}")
+        raise HTTPException(
+            status_code=400,
+            detail="Stock cannot go negative"
+        )
+    
+    # Replay the movements in request order to record each one's before/after stock
+    running_stock = {
+        item_id: items[item_id].current_stock - delta for item_id, delta in item_deltas.items()
+    }
+    rows = []
+    for movement, delta in zip(movements, deltas):
+        previous_stock = running_stock[movement.item_id]
+        running_stock[movement.item_id] = previous_stock + delta
+        rows.append({
+            "inventory_item_id": movement.item_id,
+            "movement_type": movement.movement_type,
+            "quantity": movement.quantity,
+            "previous_stock": previous_stock,
+            "new_stock": previous_stock + delta,
+            "reference_number": movement.reference_number,
+            "notes": movement.notes,
+            "created_by": current_user.id
+        })
+    
+    stock_movements = (await db.execute(
+        insert(StockMovement).returning(*StockMovement.__table__.columns, sort_by_parameter_order=True),
+        rows
+    )).all()
+    
+    await db.commit()
+    
+    for branch_id in {item.branch_id for item in items.values()}:
+        background_tasks.add_task(cache.invalidate_inventory_listing, branch_id)
+    
+    # Log activity
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=current_user.id,
+        action="stock_movement",
+        entity_type="inventory_item",
+        description=f"Bulk stock movement: {len(movements)} movements across {len(items)} items"
+    )
+    
+    return [
+        StockMovementResponse.model_construct(
+            **stock_movement._mapping,
+            item_name=items[stock_movement.inventory_item_id].item_name,
+            item_code=items[stock_movement.inventory_item_id].item_code
+        )
+        for stock_movement in stock_movements
+    ]
 
 @router.get("/inventory/items/{item_id}/stock-movements", response_model=List[StockMovementResponse])
-def get_stock_movements(
+async def get_stock_movements(
     item_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
     movement_type: Optional[str] = Query(None),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get stock movements for an item"""
     
-    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
-    
-    if not item:
-        raise HTTPException(status_code=404, detail="Inventory item not found")
-    
-    # Check branch access
-    if current_user.role != 'super_admin' and item.branch_id != current_user.branch_id:
-        raise HTTPException(status_code=403, detail="Access denied to this item")
+    item = await _get_item_or_403(
+        db, current_user, item_id,
+        load_only(InventoryItem.id, InventoryItem.branch_id, InventoryItem.item_name, InventoryItem.item_code)
+    )
     
-    # Query stock movements
-    query = db.query(StockMovement).filter(StockMovement.inventory_item_id == item_id)
+    # Query stock movement columns only; item info is already loaded above
+    query = select(*StockMovement.__table__.columns).where(StockMovement.inventory_item_id == item_id)
     
     # Apply filters
     if movement_type:
-        query = query.filter(StockMovement.movement_type == movement_type)
+        query = query.where(StockMovement.movement_type == movement_type)
     if start_date:
-        query = query.filter(StockMovement.movement_date >= start_date)
+        query = query.where(StockMovement.movement_date >= start_date)
     if end_date:
-        query = query.filter(StockMovement.movement_date <= end_date)
+        query = query.where(StockMovement.movement_date <= end_date)
     
-    movements = query.order_by(desc(StockMovement.movement_date)).offset(skip).limit(limit).all()
+    query = query.order_by(desc(StockMovement.movement_date), desc(StockMovement.id))
     
-    # Enrich with item info
-    enriched_movements = []
-    for movement in movements:
-        movement_dict = {
-            **movement.__dict__,
-            'item_name': item.item_name,
-            'item_code': item.item_code
-        }
-        enriched_movements.append(StockMovementResponse(**movement_dict))
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, datetime, int)
+        query = query.where(tuple_(StockMovement.movement_date, StockMovement.id) < tuple_(last_date, last_id))
+    else:
+        query = query.offset(skip)
     
-    return enriched_movements
+    movements = (await db.execute(query.limit(limit))).all()
+    set_next_cursor(response, movements, limit, "movement_date", "id")
+    
+    # Rows come straight from the database, so skip re-validating them
+    return [
+        StockMovementResponse.model_construct(
+            **movement._mapping,
+            item_name=item.item_name,
+            item_code=item.item_code
+        )
+        for movement in movements
+    ]
 
 @router.get("/inventory/alerts")
-def get_inventory_alerts(
+async def get_inventory_alerts(
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get inventory alerts (low stock, expiring items)"""
     
     # Filter by branch access
-    if current_user.role == 'super_admin':
-        items = db.query(InventoryItem).filter(InventoryItem.is_active == True).all()
-    else:
-        items = db.query(InventoryItem).filter(
-            and_(
-                InventoryItem.branch_id == current_user.branch_id,
-                InventoryItem.is_active == True
-            )
-        ).all()
-    
-    low_stock_alerts = []
-    expiry_alerts = []
+    scope = [InventoryItem.is_active == True]
+    if current_user.role != 'super_admin':
+        scope.append(InventoryItem.branch_id == current_user.branch_id)
+    
+    # Only alerting rows, only the columns each alert needs
+    low_stock_items = (await db.execute(
+        select(
+            InventoryItem.id,
+            InventoryItem.item_name,
+            InventoryItem.item_code,
+            InventoryItem.current_stock,
+            InventoryItem.minimum_stock
+        ).where(*scope, InventoryItem.current_stock <= InventoryItem.minimum_stock)
+    )).all()
+    
+    now = datetime.now()
+    expiring_items = (await db.execute(
+        select(
+            InventoryItem.id,
+            InventoryItem.item_name,
+            InventoryItem.item_code,
+            InventoryItem.expiry_date
+        ).where(*scope, InventoryItem.expiry_date < now + timedelta(days=31))
+    )).all()
+    
+    low_stock_alerts = [
+        {
+            "item_id": item.id,
+            "item_name": item.item_name,
+            "item_code": item.item_code,
+            "current_stock": item.current_stock,
+            "minimum_stock": item.minimum_stock,
+            "stock_status": "Low Stock" if item.current_stock > 0 else "Out of Stock",
+            "alert_type": "low_stock"
+        }
+        for item in low_stock_items
+    ]
     
-    for item in items:
-        # Low stock alerts
-        if item.current_stock <= item.minimum_stock:
-            low_stock_alerts.append({
-                "item_id": item.id,
-                "item_name": item.item_name,
-                "item_code": item.item_code,
-                "current_stock": item.current_stock,
-                "minimum_stock": item.minimum_stock,
-                "stock_status": "Low Stock" if item.current_stock > 0 else "Out of Stock",
-                "alert_type": "low_stock"
-            })
-        
-        # Expiry alerts
-        if item.expiry_date:
-            days_to_expiry = (item.expiry_date - datetime.now()).days
-            if days_to_expiry <= 30:
-                expiry_alerts.append({
-                    "item_id": item.id,
-                    "item_name": item.item_name,
-                    "item_code": item.item_code,
-                    "expiry_date": item.expiry_date,
-                    "days_to_expiry": days_to_expiry,
-                    "expiry_status": "Expired" if days_to_expiry < 0 else "Expiring Soon",
-                    "alert_type": "expiry"
-                })
+    expiry_alerts = []
+    for item in expiring_items:
+        days_to_expiry = (item.expiry_date - now).days
+        expiry_alerts.append({
+            "item_id": item.id,
+            "item_name": item.item_name,
+            "item_code": item.item_code,
+            "expiry_date": item.expiry_date,
+            "days_to_expiry": days_to_expiry,
+            "expiry_status": "Expired" if days_to_expiry < 0 else "Expiring Soon",
+            "alert_type": "expiry"
+        })
     
     return {
         "low_stock_alerts": low_stock_alerts,
@@ -548,18 +727,27 @@ def get_inventory_alerts(
     }
 
 @router.get("/inventory/categories")
-def get_inventory_categories(
+async def get_inventory_categories(
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of inventory categories"""
     
     # Filter by branch access
-    if current_user.role == 'super_admin':
-        categories = db.query(InventoryItem.category).distinct().all()
-    else:
-        categories = db.query(InventoryItem.category).filter(
-            InventoryItem.branch_id == current_user.branch_id
-        ).distinct().all()
+    cache_key = "all" if current_user.role == 'super_admin' else current_user.branch_id
+    
+    with _categories_lock:
+        cached = _categories_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    query = select(InventoryItem.category).distinct()
+    if current_user.role != 'super_admin':
+        query = query.where(InventoryItem.branch_id == current_user.branch_id)
+    
+    categories = await db.scalars(query)
+    result = [{"category": category} for category in categories]
+    with _categories_lock:
+        _categories_cache[cache_key] = result
     
-    return [{"category": cat[0]} for cat in categories]
+    return result
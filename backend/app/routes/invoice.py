@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.models.invoice import Invoice
 from app.schemas.invoice import InvoiceCreate, InvoiceResponse
@@ -8,10 +9,11 @@ router = APIRouter()
 
 @router.post("/invoices/", response_model=InvoiceResponse, status_code=201)
 def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db)):
-    new_invoice = Invoice(**invoice.model_dump())
-    db.add(new_invoice)
+    # RETURNING hands back the stored row, so no refresh SELECT after the commit
+    new_invoice = db.execute(
+        insert(Invoice).values(**invoice.model_dump()).returning(*Invoice.__table__.columns)
+    ).mappings().one()
     db.commit()
-    db.refresh(new_invoice)
     return new_invoice
 
 @router.get("/invoices/{invoice_id}", response_model=InvoiceResponse)
@@ -1,20 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.lab_result import LabResult
-from app.schemas.lab_result import LabResultCreate, LabResultResponse
-from app.utils.database import get_db
+from app.schemas.lab_result import LabResultBulkCreate, LabResultCreate, LabResultResponse
+from app.utils.database import get_db, get_async_db
+from app.utils.pagination import decode_cursor, set_next_cursor
 
 router = APIRouter()
 
 @router.post("/lab-results/", response_model=LabResultResponse, status_code=201)
 def create_lab_result(result: LabResultCreate, db: Session = Depends(get_db)):
-    new_result = LabResult(**result.model_dump())
-    db.add(new_result)
+    # RETURNING hands back the stored row, so no refresh SELECT after the commit
+    new_result = db.execute(
+        insert(LabResult).values(**result.model_dump()).returning(*LabResult.__table__.columns)
+    ).mappings().one()
     db.commit()
-    db.refresh(new_result)
     return new_result
 
+@router.post("/lab-results/bulk", response_model=list[LabResultResponse], status_code=201)
+def create_lab_results_bulk(bulk_data: LabResultBulkCreate, db: Session = Depends(get_db)):
+    # A whole run of results in one multi-row INSERT and a single commit; plain
+    # RETURNING rows so the response doesn't reload objects expired by the commit
+    new_results = db.execute(
+        insert(LabResult).returning(*LabResult.__table__.columns, sort_by_parameter_order=True),
+        [result.model_dump() for result in bulk_data.results]
+    ).mappings().all()
+    db.commit()
+    return new_results
+
 @router.get("/lab-results/{patient_id}", response_model=list[LabResultResponse])
-def get_lab_results(patient_id: int, db: Session = Depends(get_db)):
-    results = db.query(LabResult).filter(LabResult.patient_id == patient_id).all()
-    return results
\ No newline at end of file
+async def get_lab_results(
+    patient_id: int,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Newest first, keyset paginated on id over the (patient_id, id) index
+    query = select(LabResult).where(LabResult.patient_id == patient_id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(LabResult.id < last_id)
+    results = (await db.scalars(query.order_by(LabResult.id.desc()).limit(limit))).all()
+    set_next_cursor(response, results, limit, "id")
+    return results
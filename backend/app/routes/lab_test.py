@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.models.lab_test import LabTest
 from app.models.user import User
 from app.utils.database import get_db
 from app.utils.auth_guard import get_current_user
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/lab-tests/")
 def assign_lab_test(
@@ -31,7 +32,7 @@ def assign_lab_test(
         "id": test.id,
         "test_type": test.test_type,
         "status": test.status,
-        "created_at": test.created_at.isoformat()
+        "created_at": test.created_at
     }
 @router.put("/lab-tests/{test_id}/result/")
 def submit_lab_result(
@@ -57,34 +58,21 @@ def submit_lab_result(
         "status": test.status,
         "result": test.result
     }
-from weasyprint import HTML
 from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.database import get_async_db
+from app.utils.pdf_generator import LAB_REPORT_TEMPLATE, render_pdf_async
 
 @router.get("/lab-tests/{test_id}/pdf/")
-def generate_lab_report_pdf(
+async def generate_lab_report_pdf(
     test_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    test = db.query(LabTest).filter(LabTest.id == test_id).first()
+    test = await db.get(LabTest, test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
 
-    html_content = f"""
-    <html>
-    <head><title>Lab Report #{test.id}</title></head>
-    <body>
-        <h1>Lab Report</h1>
-        <p><strong>Test ID:</strong> {test.id}</p>
-        <p><strong>Patient ID:</strong> {test.patient_id}</p>
-        <p><strong>Technician ID:</strong> {test.technician_id}</p>
-        <p><strong>Test Type:</strong> {test.test_type}</p>
-        <p><strong>Status:</strong> {test.status}</p>
-        <p><strong>Result:</strong><br>{test.result}</p>
-        <p><strong>Created At:</strong> {test.created_at.strftime('%Y-%m-%d %H:%M')}</p>
-    </body>
-    </html>
-    """
-
-    pdf = HTML(string=html_content).write_pdf()
-    return Response(content=pdf, media_type="application/pdf")
\ No newline at end of file
+    # Rendered on the dedicated PDF limiter, not the shared request threadpool
+    pdf = await render_pdf_async(LAB_REPORT_TEMPLATE, test=test)
+    return Response(content=pdf, media_type="application/pdf")
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app.utils.database import get_db
 from app.utils.auth_guard import get_current_user
 from app.models.user import User
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.get("/mobile/patients/")
 def get_patients_for_mobile(
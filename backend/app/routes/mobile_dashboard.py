@@ -1,10 +1,14 @@
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi.responses import ORJSONResponse
 from app.utils.database import get_db
 from app.utils.auth_guard import get_current_user
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from app.models.user import User
-router = APIRouter()
+from app.models.lab_test import LabTest
+from app.models.patient_entry import PatientEntry
+router = APIRouter(default_response_class=ORJSONResponse)
 @router.get("/mobile/dashboard/")
 def mobile_dashboard(
     db: Session = Depends(get_db),
@@ -13,14 +17,16 @@ def mobile_dashboard(
     role = current_user.role
 
     if role == "technician":
-        pending_tests = db.query(LabTest).filter(
+        # Answered from the (technician_id, status) index
+        pending_tests = db.query(func.count(LabTest.id)).filter(
             LabTest.technician_id == current_user.id,
             LabTest.status == "pending"
-        ).count()
+        ).scalar()
         return {"role": "technician", "pending_tests": pending_tests}
 
     elif role == "admin":
-        total_patients = db.query(PatientEntry).count()
+        # A bare count(id) instead of wrapping the entity query in Query.count()
+        total_patients = db.scalar(select(func.count(PatientEntry.id)))
         return {"role": "admin", "total_patients": total_patients}
 
     return {"role": role, "message": "No dashboard available"}
\ No newline at end of file
@@ -1,27 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, desc, func, tuple_, update, exists, insert, select
 from typing import List, Optional
+from threading import Lock
+from cachetools import TTLCache
 from datetime import datetime, timedelta
+import re
 
-from app.utils.database import get_db
-from app.utils.auth_system import auth_guard, require_staff, get_current_user
-from app.models import User, Patient, DailyEntry, Branch
-from app.schemas.user import PatientCreate, PatientUpdate, PatientResponse, DailyEntryCreate, DailyEntryUpdate, DailyEntryResponse
+from app.utils.database import get_db, get_async_db
+from app.utils.auth_system import AccessContext, auth_guard, staff_access
+from app.utils.pagination import decode_cursor, set_next_cursor
+from app.models import Patient, DailyEntry, Branch
+from app.schemas.user import (
+    PatientCreate, PatientUpdate, PatientResponse, PatientListItem,
+    DailyEntryCreate, DailyEntryBulkCreate, DailyEntryUpdate, DailyEntryResponse, DailyEntryListItem
+)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# VV + two-letter branch code + sequential number, as generated in create_patient
+PATIENT_ID_PATTERN = re.compile(r"^VV[A-Z]{2}\d{4,}$", re.IGNORECASE)
+
+# Branches are never deleted, so a branch seen once stays valid: remember the
+# known IDs for a few minutes instead of querying on every daily entry insert
+_known_branches = TTLCache(maxsize=1024, ttl=300)
+_known_branches_lock = Lock()
+
+def branch_exists(db: Session, branch_id: int) -> bool:
+    with _known_branches_lock:
+        if branch_id in _known_branches:
+            return True
+    
+    found = db.query(exists().where(Branch.id == branch_id)).scalar()
+    if found:
+        with _known_branches_lock:
+            _known_branches[branch_id] = True
+    return found
 
 @router.post("/patients/", response_model=PatientResponse)
 def create_patient(
     patient_data: PatientCreate,
-    current_user: User = Depends(require_staff),
+    background_tasks: BackgroundTasks,
+    ctx: AccessContext = Depends(staff_access),
     db: Session = Depends(get_db)
 ):
     """Create a new patient record"""
     
     # Ensure branch access
-    if current_user.role != 'super_admin':
-        patient_data.branch_id = current_user.branch_id
+    if not ctx.is_super_admin:
+        patient_data.branch_id = ctx.branch_id
     
     # Check for duplicate patient (same phone number in same branch)
     existing_patient = db.query(Patient).filter(
@@ -37,27 +66,20 @@ def create_patient(
             detail="Patient with this phone number already exists in this branch"
         )
     
-    # Generate patient ID
-    branch = db.query(Branch).filter(Branch.id == patient_data.branch_id).first()
+    # Generate patient ID (VV + Branch Code + Sequential Number). Bumping the branch
+    # counter row-locks it until commit, so concurrent creates never share a number
+    branch = db.execute(
+        update(Branch)
+        .where(Branch.id == patient_data.branch_id)
+        # Keep updated_at as is: a counter bump is not a change to the branch
+        .values(last_patient_no=Branch.last_patient_no + 1, updated_at=Branch.updated_at)
+        .returning(Branch.name, Branch.last_patient_no)
+    ).first()
     if not branch:
         raise HTTPException(status_code=404, detail="Branch not found")
     
-    # Generate patient ID (VV + Branch Code + Sequential Number)
     branch_code = branch.name[:2].upper()
-    last_patient = db.query(Patient).filter(
-        Patient.branch_id == patient_data.branch_id
-    ).order_by(desc(Patient.id)).first()
-    
-    if last_patient:
-        try:
-            last_number = int(last_patient.patient_id[-4:])
-            new_number = last_number + 1
-        except:
-            new_number = 1
-    else:
-        new_number = 1
-    
-    patient_id = f"VV{branch_code}{new_number:04d}"
+    patient_id = f"VV{branch_code}{branch.last_patient_no:04d}"
     
     # Create patient
     db_patient = Patient(
@@ -86,9 +108,9 @@ def create_patient(
     db.refresh(db_patient)
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=ctx.user_id,
         action="create",
         entity_type="patient",
         entity_id=db_patient.id,
@@ -97,47 +119,59 @@ def create_patient(
     
     return db_patient
 
-@router.get("/patients/", response_model=List[PatientResponse])
-def get_patients(
+@router.get("/patients/", response_model=List[PatientListItem])
+async def get_patients(
+    response: Response,
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None, description="Search by name or phone"),
     branch_id: Optional[int] = Query(None),
-    current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    ctx: AccessContext = Depends(staff_access),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of patients with search and filtering"""
     
+    # Only the list columns, not the medical and address fields
+    query = select(*(getattr(Patient, name) for name in PatientListItem.model_fields))
+    
     # Filter by branch access
-    if current_user.role == 'super_admin':
-        query = db.query(Patient)
+    if ctx.is_super_admin:
         if branch_id:
-            query = query.filter(Patient.branch_id == branch_id)
+            query = query.where(Patient.branch_id == branch_id)
     else:
-        query = db.query(Patient).filter(Patient.branch_id == current_user.branch_id)
+        query = query.where(Patient.branch_id == ctx.branch_id)
     
-    # Search functionality
+    # Search functionality: a full patient ID is an exact unique-index lookup,
+    # anything else one trigram-indexed match over names, phone and ID
     if search:
-        search_filter = or_(
-            Patient.first_name.ilike(f"%{search}%"),
-            Patient.last_name.ilike(f"%{search}%"),
-            Patient.phone.ilike(f"%{search}%"),
-            Patient.patient_id.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
+        if PATIENT_ID_PATTERN.match(search):
+            query = query.where(Patient.patient_id == search.upper())
+        else:
+            query = query.where(Patient.search_blob.ilike(f"%{search}%"))
     
     # Only active patients
-    query = query.filter(Patient.is_active == True)
+    query = query.where(Patient.is_active == True)
+    
+    # Newest registrations first
+    query = query.order_by(desc(Patient.registration_date), desc(Patient.id))
+    
+    # Keyset pagination when a cursor is given; skip stays for existing clients
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, datetime, int)
+        query = query.where(tuple_(Patient.registration_date, Patient.id) < tuple_(last_date, last_id))
+    else:
+        query = query.offset(skip)
     
-    # Order by registration date
-    patients = query.order_by(desc(Patient.registration_date)).offset(skip).limit(limit).all()
+    patients = (await db.execute(query.limit(limit))).all()
+    set_next_cursor(response, patients, limit, "registration_date", "id")
     
     return patients
 
 @router.get("/patients/{patient_id}", response_model=PatientResponse)
 def get_patient(
     patient_id: int,
-    current_user: User = Depends(require_staff),
+    ctx: AccessContext = Depends(staff_access),
     db: Session = Depends(get_db)
 ):
     """Get patient by ID"""
@@ -148,7 +182,7 @@ def get_patient(
         raise HTTPException(status_code=404, detail="Patient not found")
     
     # Check branch access
-    if current_user.role != 'super_admin' and patient.branch_id != current_user.branch_id:
+    if not ctx.can_access(patient.branch_id):
         raise HTTPException(status_code=403, detail="Access denied to this patient")
     
     return patient
@@ -157,7 +191,8 @@ def get_patient(
 def update_patient(
     patient_id: int,
     patient_data: PatientUpdate,
-    current_user: User = Depends(require_staff),
+    background_tasks: BackgroundTasks,
+    ctx: AccessContext = Depends(staff_access),
     db: Session = Depends(get_db)
 ):
     """Update patient information"""
@@ -168,7 +203,7 @@ def update_patient(
         raise HTTPException(status_code=404, detail="Patient not found")
     
     # Check branch access
-    if current_user.role != 'super_admin' and patient.branch_id != current_user.branch_id:
+    if not ctx.can_access(patient.branch_id):
         raise HTTPException(status_code=403, detail="Access denied to this patient")
     
     # Update fields
@@ -179,9 +214,9 @@ def update_patient(
     db.refresh(patient)
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=ctx.user_id,
         action="update",
         entity_type="patient",
         entity_id=patient.id,
@@ -195,18 +230,29 @@ def get_patient_history(
     patient_id: int,
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    current_user: User = Depends(require_staff),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    ctx: AccessContext = Depends(staff_access),
     db: Session = Depends(get_db)
 ):
     """Get patient history (daily entries, appointments, invoices)"""
     
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    # Only the columns the response and the branch check need
+    patient = db.query(
+        Patient.id,
+        Patient.branch_id,
+        Patient.patient_id,
+        Patient.first_name,
+        Patient.last_name,
+        Patient.phone,
+        Patient.email
+    ).filter(Patient.id == patient_id).first()
     
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
     # Check branch access
-    if current_user.role != 'super_admin' and patient.branch_id != current_user.branch_id:
+    if not ctx.can_access(patient.branch_id):
         raise HTTPException(status_code=403, detail="Access denied to this patient")
     
     # Get date range (default: last 30 days)
@@ -215,16 +261,39 @@ def get_patient_history(
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    # Get daily entries
-    daily_entries = db.query(DailyEntry).filter(
-        and_(
-            DailyEntry.patient_id == patient_id,
-            DailyEntry.entry_date >= start_date,
-            DailyEntry.entry_date <= end_date
-        )
-    ).order_by(desc(DailyEntry.entry_date)).all()
+    entry_filter = and_(
+        DailyEntry.patient_id == patient_id,
+        DailyEntry.entry_date >= start_date,
+        DailyEntry.entry_date <= end_date
+    )
     
-    # Format response
+    # Totals cover the whole range, independent of the page returned
+    total_visits, total_amount, total_paid = db.query(
+        func.count(DailyEntry.id),
+        func.coalesce(func.sum(DailyEntry.total_amount), 0),
+        func.coalesce(func.sum(DailyEntry.amount_paid), 0)
+    ).filter(entry_filter).one()
+    
+    # Get one page of daily entries, only the columns the response carries
+    daily_entries = db.query(
+        DailyEntry.id,
+        DailyEntry.entry_date,
+        DailyEntry.entry_time,
+        DailyEntry.doctor_name,
+        DailyEntry.doctor_specialization,
+        DailyEntry.consultation_fee,
+        DailyEntry.test_names,
+        DailyEntry.test_cost,
+        DailyEntry.total_amount,
+        DailyEntry.payment_status,
+        DailyEntry.payment_mode,
+        DailyEntry.amount_paid,
+        DailyEntry.notes
+    ).filter(entry_filter).order_by(
+        desc(DailyEntry.entry_date), desc(DailyEntry.id)
+    ).offset(skip).limit(limit).all()
+    
+    # Format response; Decimal amounts are converted by the JSON encoder
     history = {
         "patient": {
             "id": patient.id,
@@ -245,23 +314,25 @@ def get_patient_history(
                 "entry_time": entry.entry_time,
                 "doctor_name": entry.doctor_name,
                 "doctor_specialization": entry.doctor_specialization,
-                "consultation_fee": float(entry.consultation_fee),
+                "consultation_fee": entry.consultation_fee,
                 "test_names": entry.test_names,
-                "test_cost": float(entry.test_cost),
-                "total_amount": float(entry.total_amount),
+                "test_cost": entry.test_cost,
+                "total_amount": entry.total_amount,
                 "payment_status": entry.payment_status,
                 "payment_mode": entry.payment_mode,
-                "amount_paid": float(entry.amount_paid),
+                "amount_paid": entry.amount_paid,
                 "notes": entry.notes
             }
             for entry in daily_entries
         ],
         "summary": {
-            "total_visits": len(daily_entries),
-            "total_amount": sum(float(entry.total_amount) for entry in daily_entries),
-            "total_paid": sum(float(entry.amount_paid) for entry in daily_entries),
-            "pending_amount": sum(float(entry.total_amount - entry.amount_paid) for entry in daily_entries)
-        }
+            "total_visits": total_visits,
+            "total_amount": total_amount,
+            "total_paid": total_paid,
+            "pending_amount": total_amount - total_paid
+        },
+        "page": skip // limit + 1,
+        "limit": limit
     }
     
     return history
@@ -269,28 +340,31 @@ def get_patient_history(
 @router.delete("/patients/{patient_id}")
 def deactivate_patient(
     patient_id: int,
-    current_user: User = Depends(require_staff),
+    background_tasks: BackgroundTasks,
+    ctx: AccessContext = Depends(staff_access),
     db: Session = Depends(get_db)
 ):
     """Deactivate patient (soft delete)"""
     
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    # Deactivate in one UPDATE, scoped to the user's branch unless super admin
+    stmt = update(Patient).where(Patient.id == patient_id)
+    if not ctx.is_super_admin:
+        stmt = stmt.where(Patient.branch_id == ctx.branch_id)
+    patient = db.execute(
+        stmt.values(is_active=False).returning(Patient.id, Patient.first_name, Patient.last_name)
+    ).first()
     
     if not patient:
+        if db.query(exists().where(Patient.id == patient_id)).scalar():
+            raise HTTPException(status_code=403, detail="Access denied to this patient")
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    # Check branch access
-    if current_user.role != 'super_admin' and patient.branch_id != current_user.branch_id:
-        raise HTTPException(status_code=403, detail="Access denied to this patient")
-    
-    # Deactivate patient
-    patient.is_active = False
     db.commit()
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=ctx.user_id,
         action="deactivate",
         entity_type="patient",
         entity_id=patient.id,
@@ -303,18 +377,18 @@ def deactivate_patient(
 @router.post("/daily-entries/", response_model=DailyEntryResponse)
 def create_daily_entry(
     entry_data: DailyEntryCreate,
-    current_user: User = Depends(require_staff),
+    background_tasks: BackgroundTasks,
+    ctx: AccessContext = Depends(staff_access),
     db: Session = Depends(get_db)
 ):
     """Create a new daily entry"""
     
     # Ensure branch access
-    if current_user.role != 'super_admin':
-        entry_data.branch_id = current_user.branch_id
+    if not ctx.is_super_admin:
+        entry_data.branch_id = ctx.branch_id
     
     # Validate branch exists
-    branch = db.query(Branch).filter(Branch.id == entry_data.branch_id).first()
-    if not branch:
+    if not branch_exists(db, entry_data.branch_id):
         raise HTTPException(status_code=404, detail="Branch not found")
     
     # If patient_id provided, validate patient exists and belongs to branch
@@ -350,7 +424,7 @@ def create_daily_entry(
         amount_paid=entry_data.amount_paid,
         notes=entry_data.notes,
         referred_by=entry_data.referred_by,
-        created_by=current_user.id
+        created_by=ctx.user_id
     )
     
     db.add(db_entry)
@@ -358,9 +432,9 @@ def create_daily_entry(
     db.refresh(db_entry)
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=ctx.user_id,
         action="create",
         entity_type="daily_entry",
         entity_id=db_entry.id,
@@ -369,9 +443,63 @@ def create_daily_entry(
     
     return db_entry
 
-@router.get("/daily-entries/", response_model=List[DailyEntryResponse])
-def get_daily_entries(
+@router.post("/daily-entries/bulk")
+def create_daily_entries_bulk(
+    bulk_data: DailyEntryBulkCreate,
+    background_tasks: BackgroundTasks,
+    ctx: AccessContext = Depends(staff_access),
+    db: Session = Depends(get_db)
+):
+    """Create a batch of daily entries for one branch in one INSERT"""
+    
+    # Ensure branch access
+    branch_id = bulk_data.branch_id if ctx.is_super_admin else ctx.branch_id
+    if branch_id is None:
+        raise HTTPException(status_code=400, detail="branch_id is required")
+    
+    if not branch_exists(db, branch_id):
+        raise HTTPException(status_code=404, detail="Branch not found")
+    
+    # Every referenced patient must belong to the branch
+    patient_ids = {entry.patient_id for entry in bulk_data.entries if entry.patient_id}
+    if patient_ids:
+        found = {
+            row.id for row in db.query(Patient.id).filter(
+                and_(
+                    Patient.id.in_(patient_ids),
+                    Patient.branch_id == branch_id
+                )
+            ).all()
+        }
+        missing = patient_ids - found
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Patients not found in this branch: {sorted(missing)}")
+    
+    # Create daily entries with a single multi-row INSERT and one commit
+    rows = [
+        {**entry.model_dump(), "branch_id": branch_id, "created_by": ctx.user_id}
+        for entry in bulk_data.entries
+    ]
+    created_ids = db.scalars(insert(DailyEntry).returning(DailyEntry.id), rows).all()
+    db.commit()
+    
+    # Log activity
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=ctx.user_id,
+        action="create",
+        entity_type="daily_entry",
+        entity_id=created_ids[0],
+        description=f"Bulk created {len(created_ids)} daily entries"
+    )
+    
+    return {"message": "Daily entries created successfully", "created": len(created_ids), "ids": created_ids}
+
+@router.get("/daily-entries/", response_model=List[DailyEntryListItem])
+async def get_daily_entries(
+    response: Response,
     skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
     limit: int = Query(100, ge=1, le=1000),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
@@ -379,52 +507,65 @@ def get_daily_entries(
     patient_name: Optional[str] = Query(None),
     payment_status: Optional[str] = Query(None),
     branch_id: Optional[int] = Query(None),
-    current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    ctx: AccessContext = Depends(staff_access),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get daily entries with filtering"""
     
+    # Only the list columns; the nested patient is left to GET /daily-entries/{id}
+    query = select(*(getattr(DailyEntry, name) for name in DailyEntryListItem.model_fields))
+    
     # Filter by branch access
-    if current_user.role == 'super_admin':
-        query = db.query(DailyEntry)
+    if ctx.is_super_admin:
         if branch_id:
-            query = query.filter(DailyEntry.branch_id == branch_id)
+            query = query.where(DailyEntry.branch_id == branch_id)
     else:
-        query = db.query(DailyEntry).filter(DailyEntry.branch_id == current_user.branch_id)
+        query = query.where(DailyEntry.branch_id == ctx.branch_id)
     
     # Date range filter
     if start_date:
-        query = query.filter(DailyEntry.entry_date >= start_date)
+        query = query.where(DailyEntry.entry_date >= start_date)
     if end_date:
-        query = query.filter(DailyEntry.entry_date <= end_date)
+        query = query.where(DailyEntry.entry_date <= end_date)
     
     # Other filters
     if doctor_name:
-        query = query.filter(DailyEntry.doctor_name.ilike(f"%{doctor_name}%"))
+        query = query.where(DailyEntry.doctor_name.ilike(f"%{doctor_name}%"))
     if patient_name:
-        query = query.filter(DailyEntry.patient_name.ilike(f"%{patient_name}%"))
+        query = query.where(DailyEntry.patient_name.ilike(f"%{patient_name}%"))
     if payment_status:
-        query = query.filter(DailyEntry.payment_status == payment_status)
+        query = query.where(DailyEntry.payment_status == payment_status)
+    
+    query = query.order_by(desc(DailyEntry.entry_date), desc(DailyEntry.id))
     
-    entries = query.order_by(desc(DailyEntry.entry_date)).offset(skip).limit(limit).all()
+    # Keyset pagination when a cursor is given; skip stays for existing clients
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, datetime, int)
+        query = query.where(tuple_(DailyEntry.entry_date, DailyEntry.id) < tuple_(last_date, last_id))
+    else:
+        query = query.offset(skip)
+    
+    entries = (await db.execute(query.limit(limit))).all()
+    set_next_cursor(response, entries, limit, "entry_date", "id")
     
     return entries
 
 @router.get("/daily-entries/{entry_id}", response_model=DailyEntryResponse)
 def get_daily_entry(
     entry_id: int,
-    current_user: User = Depends(require_staff),
+    ctx: AccessContext = Depends(staff_access),
     db: Session = Depends(get_db)
 ):
     """Get daily entry by ID"""
     
-    entry = db.query(DailyEntry).filter(DailyEntry.id == entry_id).first()
+    # Load the nested patient in the same query instead of a lazy load on serialization
+    entry = db.query(DailyEntry).options(joinedload(DailyEntry.patient)).filter(DailyEntry.id == entry_id).first()
     
     if not entry:
         raise HTTPException(status_code=404, detail="Daily entry not found")
     
     # Check branch access
-    if current_user.role != 'super_admin' and entry.branch_id != current_user.branch_id:
+    if not ctx.can_access(entry.branch_id):
         raise HTTPException(status_code=403, detail="Access denied to this entry")
     
     return entry
@@ -433,7 +574,8 @@ def get_daily_entry(
 def update_daily_entry(
     entry_id: int,
     entry_data: DailyEntryUpdate,
-    current_user: User = Depends(require_staff),
+    background_tasks: BackgroundTasks,
+    ctx: AccessContext = Depends(staff_access),
     db: Session = Depends(get_db)
 ):
     """Update daily entry"""
@@ -444,7 +586,7 @@ def update_daily_entry(
         raise HTTPException(status_code=404, detail="Daily entry not found")
     
     # Check branch access
-    if current_user.role != 'super_admin' and entry.branch_id != current_user.branch_id:
+    if not ctx.can_access(entry.branch_id):
         raise HTTPException(status_code=403, detail="Access denied to this entry")
     
     # Update fields
@@ -455,9 +597,9 @@ def update_daily_entry(
     db.refresh(entry)
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=ctx.user_id,
         action="update",
         entity_type="daily_entry",
         entity_id=entry.id,
@@ -469,7 +611,8 @@ def update_daily_entry(
 @router.delete("/daily-entries/{entry_id}")
 def delete_daily_entry(
     entry_id: int,
-    current_user: User = Depends(require_staff),
+    background_tasks: BackgroundTasks,
+    ctx: AccessContext = Depends(staff_access),
     db: Session = Depends(get_db)
 ):
     """Delete daily entry"""
@@ -480,16 +623,16 @@ def delete_daily_entry(
         raise HTTPException(status_code=404, detail="Daily entry not found")
     
     # Check branch access
-    if current_user.role != 'super_admin' and entry.branch_id != current_user.branch_id:
+    if not ctx.can_access(entry.branch_id):
         raise HTTPException(status_code=403, detail="Access denied to this entry")
     
     db.delete(entry)
     db.commit()
     
     # Log activity
-    auth_guard.log_activity(
-        db=db,
-        user=current_user,
+    background_tasks.add_task(
+        auth_guard.log_activity_background,
+        user_id=ctx.user_id,
         action="delete",
         entity_type="daily_entry",
         entity_id=entry_id,
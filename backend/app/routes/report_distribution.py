@@ -10,27 +10,34 @@ Provides automatic report distribution to doctors across all branches:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, selectinload, raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, desc, func, case, insert, select
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import datetime, timedelta
-import uuid
-import random
+import secrets
 import json
+import logging
 
-from app.utils.database import get_db
+from app.utils.database import get_db, get_async_db, AsyncSessionLocal
 from app.utils.auth_system import auth_guard, require_staff, get_current_user, require_role
 from app.models import User, Branch, Patient, LabResult
 from app.models.doctor import (
     Doctor, DoctorBranch, ReportDistribution, ReportTemplate, 
     DoctorNotification
 )
+from app.services.redis_cache import cache
+from app.routes.doctor_management import doctor_unread_count, UNREAD_REPORT_STATUSES
 from app.services.websocket_service import connection_manager, NotificationFactory
 from app.services.sms_service import get_sms_service
 from app.services.whatsapp_service import get_whatsapp_service
 from app.services.email_service import get_email_service
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 # ============ Pydantic Schemas ============
@@ -63,6 +70,12 @@ class ReportDistributionResponse(BaseModel):
         from_attributes = True
 
 
+# Listing projection: exactly the columns ReportDistributionResponse exposes
+DISTRIBUTION_LIST_COLUMNS = [
+    getattr(ReportDistribution, name) for name in ReportDistributionResponse.model_fields
+]
+
+
 class DistributionSummary(BaseModel):
     """Summary of report distribution"""
     total_distributions: int
@@ -77,64 +90,78 @@ class DistributionSummary(BaseModel):
 
 def generate_distribution_id():
     """Generate unique distribution ID"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    random_num = random.randint(1000, 9999)
-    return f"RD-{timestamp}-{random_num}"
+    return f"RD-{datetime.now().strftime('%Y%m%d%H%M%S')}-{secrets.token_hex(3).upper()}"
 
 
-async def distribute_report_to_doctor(
-    db: Session,
+async def create_distributions(
+    db: AsyncSession,
     lab_result: LabResult,
-    doctor: Doctor,
-    branch_id: int,
+    doctors: List[Doctor],
     delivery_methods: List[str],
     priority: str,
     created_by: int
-) -> ReportDistribution:
-    """Distribute a report to a single doctor"""
-    
-    # Check if already distributed
-    existing = db.query(ReportDistribution).filter(
-        and_(
-            ReportDistribution.lab_result_id == lab_result.id,
-            ReportDistribution.doctor_id == doctor.id
-        )
-    ).first()
-    
-    if existing and not existing.delivery_status == "failed":
-        return existing
+):
+    """
+    Create distributions of a report for several doctors with one INSERT.
     
-    # Determine delivery method
-    delivery_method = delivery_methods[0] if delivery_methods else "portal"
+    Returns (existing, created) dicts keyed by doctor id; doctors who already
+    hold a live distribution for this result are not given a new one.
+    """
     
-    # Create distribution record
-    distribution = ReportDistribution(
-        distribution_id=generate_distribution_id(),
-        lab_result_id=lab_result.id,
-        patient_id=lab_result.patient_id,
-        branch_id=branch_id,
-        doctor_id=doctor.id,
-        report_type=lab_result.test_category,
-        report_name=lab_result.test_name,
-        delivery_status="pending",
-        delivery_method=delivery_method,
-        priority=priority,
-        created_by=created_by,
-        is_urgent=priority == "urgent"
-    )
+    # One distribution per doctor, however often they were listed
+    doctors = list({doctor.id: doctor for doctor in doctors}.values())
     
-    db.add(distribution)
-    db.commit()
-    db.refresh(distribution)
+    existing = {
+        dist.doctor_id: dist
+        for dist in await db.scalars(
+            select(ReportDistribution).where(
+                ReportDistribution.lab_result_id == lab_result.id,
+                ReportDistribution.doctor_id.in_([doctor.id for doctor in doctors]),
+                ReportDistribution.delivery_status != "failed"
+            )
+        )
+    }
     
-    # Send notifications via all channels
-    await send_report_notifications(db, lab_result, doctor, distribution, delivery_methods)
+    delivery_method = delivery_methods[0] if delivery_methods else "portal"
+    new_rows = [
+        {
+            "distribution_id": generate_distribution_id(),
+            "lab_result_id": lab_result.id,
+            "patient_id": lab_result.patient_id,
+            "branch_id": lab_result.branch_id,
+            "doctor_id": doctor.id,
+            "report_type": lab_result.test_category,
+            "report_name": lab_result.test_name,
+            "delivery_status": "pending",
+            "delivery_method": delivery_method,
+            "priority": priority,
+            "created_by": created_by,
+            "is_urgent": priority == "urgent"
+        }
+        for doctor in doctors if doctor.id not in existing
+    ]
+    
+    # One multi-row INSERT for every new distribution
+    created = {}
+    if new_rows:
+        try:
+            created = {
+                dist.doctor_id: dist
+                for dist in await db.scalars(insert(ReportDistribution).returning(ReportDistribution), new_rows)
+            }
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail="Report distribution conflicts with an existing one, please retry"
+            )
     
-    return distribution
+    return existing, created
 
 
 async def send_report_notifications(
-    db: Session,
+    db: AsyncSession,
     lab_result: LabResult,
     doctor: Doctor,
     distribution: ReportDistribution,
@@ -143,7 +170,7 @@ async def send_report_notifications(
     """Send notifications to doctor via all configured channels"""
     
     # Get patient info
-    patient = db.query(Patient).filter(Patient.id == lab_result.patient_id).first()
+    patient = await db.get(Patient, lab_result.patient_id)
     patient_name = f"{patient.first_name} {patient.last_name}" if patient else "Unknown"
     
     # Generate report URL
@@ -203,7 +230,7 @@ async def send_report_notifications(
     # 5. Send Push Notification
     if "push" in delivery_methods and doctor.notification_preferences.get("push", True):
         notification = DoctorNotification(
-            notification_id=f"NT-{uuid.uuid4().hex[:8].upper()}",
+            notification_id=f"NT-{secrets.token_hex(4).upper()}",
             doctor_id=doctor.id,
             notification_type="report_ready",
             title="New Report Available",
@@ -224,7 +251,33 @@ async def send_report_notifications(
     distribution.delivery_status = "sent"
     distribution.sent_at = datetime.utcnow()
     
-    db.commit()
+    await db.commit()
+    await cache.invalidate_doctor_dashboard(doctor.id)
+
+
+async def send_distribution_notifications(
+    lab_result_id: int,
+    distribution_ids: List[int],
+    delivery_methods: List[str]
+):
+    """Notify doctors of new distributions in a session of its own, for use from BackgroundTasks"""
+    async with AsyncSessionLocal() as db:
+        lab_result = await db.get(LabResult, lab_result_id)
+        distributions = await db.scalars(
+            select(ReportDistribution).options(
+                selectinload(ReportDistribution.doctor)
+            ).where(ReportDistribution.id.in_(distribution_ids))
+        )
+        for distribution in distributions.all():
+            try:
+                await send_report_notifications(
+                    db, lab_result, distribution.doctor, distribution, delivery_methods
+                )
+            except Exception:
+                logger.exception(
+                    "Failed to send report notifications for distribution %s to doctor %s",
+                    distribution.id, distribution.doctor_id
+                )
 
 
 # ============ Report Distribution Routes ============
@@ -234,7 +287,7 @@ async def distribute_report(
     distribution_data: ReportDistributionCreate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Distribute a lab report to doctors.
@@ -246,47 +299,51 @@ async def distribute_report(
     """
     
     # Get lab result
-    lab_result = db.query(LabResult).filter(LabResult.id == distribution_data.lab_result_id).first()
+    lab_result = await db.get(LabResult, distribution_data.lab_result_id)
     
     if not lab_result:
         raise HTTPException(status_code=404, detail="Lab result not found")
     
     # Get patient
-    patient = db.query(Patient).filter(Patient.id == lab_result.patient_id).first()
+    patient = await db.get(Patient, lab_result.patient_id)
     
     # Determine which doctors to distribute to
-    doctor_ids = distribution_data.doctor_ids or []
+    doctor_ids = list(dict.fromkeys(distribution_data.doctor_ids or []))
     
     if not doctor_ids:
         # Auto-distribute logic
         
         # 1. Get referring doctor from lab result
         if lab_result.requested_by:
-            referring_doc = db.query(Doctor).filter(
-                or_(
-                    Doctor.full_name.ilike(f"%{lab_result.requested_by}%"),
-                    Doctor.first_name.ilike(f"%{lab_result.requested_by}%")
-                )
-            ).first()
+            referring_doc = await db.scalar(
+                select(Doctor).where(
+                    or_(
+                        Doctor.full_name.ilike(f"%{lab_result.requested_by}%"),
+                        Doctor.first_name.ilike(f"%{lab_result.requested_by}%")
+                    )
+                ).limit(1)
+            )
             if referring_doc and referring_doc.id not in doctor_ids:
                 doctor_ids.append(referring_doc.id)
         
         # 2. Get doctors who have received reports for this patient before
-        previous_distributions = db.query(ReportDistribution.doctor_id).filter(
-            ReportDistribution.patient_id == lab_result.patient_id
-        ).distinct().all()
-        for (doc_id,) in previous_distributions:
+        previous_distributions = await db.scalars(
+            select(ReportDistribution.doctor_id).where(
+                ReportDistribution.patient_id == lab_result.patient_id
+            ).distinct()
+        )
+        for doc_id in previous_distributions:
             if doc_id not in doctor_ids:
                 doctor_ids.append(doc_id)
         
         # 3. Get doctors in the patient's branch
-        patient_branches = db.query(DoctorBranch).filter(
-            and_(
+        patient_branches = await db.scalars(
+            select(DoctorBranch).where(
                 DoctorBranch.branch_id == patient.branch_id,
                 DoctorBranch.is_active == True,
                 DoctorBranch.receive_all_reports == True
             )
-        ).all()
+        )
         for db_branch in patient_branches:
             if db_branch.doctor_id not in doctor_ids:
                 doctor_ids.append(db_branch.doctor_id)
@@ -299,24 +356,36 @@ async def distribute_report(
             "status": "no_recipients"
         }
     
-    # Distribute to each doctor
-    distributions = []
-    for doctor_id in doctor_ids:
-        doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
-        if doctor and doctor.is_active:
-            try:
-                distribution = await distribute_report_to_doctor(
-                    db=db,
-                    lab_result=lab_result,
-                    doctor=doctor,
-                    branch_id=lab_result.branch_id,
-                    delivery_methods=distribution_data.delivery_methods,
-                    priority=distribution_data.priority,
-                    created_by=current_user.id
-                )
-                distributions.append(distribution.id)
-            except Exception as e:
-                print(f"Error distributing to doctor {doctor_id}: {e}")
+    # Load every recipient in one query, keeping the order they were picked in
+    active_doctors = {
+        doctor.id: doctor
+        for doctor in await db.scalars(
+            select(Doctor).where(Doctor.id.in_(doctor_ids), Doctor.is_active == True)
+        )
+    }
+    recipients = [active_doctors[doctor_id] for doctor_id in doctor_ids if doctor_id in active_doctors]
+    
+    existing, created = await create_distributions(
+        db,
+        lab_result,
+        recipients,
+        distribution_data.delivery_methods,
+        distribution_data.priority,
+        current_user.id
+    )
+    
+    distributions = [
+        (existing.get(doctor.id) or created[doctor.id]).id for doctor in recipients
+    ]
+    
+    # Email/SMS/WhatsApp sends happen after the response goes out
+    if created:
+        background_tasks.add_task(
+            send_distribution_notifications,
+            lab_result.id,
+            [dist.id for dist in created.values()],
+            distribution_data.delivery_methods
+        )
     
     return {
         "message": "Report distributed successfully",
@@ -330,41 +399,46 @@ async def distribute_report(
 @router.post("/reports/distribute-to-all-branches")
 async def distribute_report_to_all_relevant_doctors(
     lab_result_id: int,
+    background_tasks: BackgroundTasks,
     delivery_methods: Optional[List[str]] = Query(["portal", "email"]),
     priority: str = Query("normal", regex="^(normal|high|urgent)$"),
     current_user: User = Depends(require_role(["admin", "branch_admin"])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Distribute a report to ALL doctors across ALL branches.
     Useful for critical/special reports that all doctors should see.
     """
     
-    lab_result = db.query(LabResult).filter(LabResult.id == lab_result_id).first()
+    lab_result = await db.get(LabResult, lab_result_id)
     
     if not lab_result:
         raise HTTPException(status_code=404, detail="Lab result not found")
     
     # Get all active doctors
-    all_doctors = db.query(Doctor).filter(Doctor.is_active == True).all()
+    all_doctors = (await db.scalars(select(Doctor).where(Doctor.is_active == True))).all()
     
-    # Get patient info
-    patient = db.query(Patient).filter(Patient.id == lab_result.patient_id).first()
-    patient_name = f"{patient.first_name} {patient.last_name}" if patient else "Unknown"
+    recipients = [
+        doctor for doctor in all_doctors
+        if doctor.notification_preferences.get("report_ready", True)
+    ]
     
-    distributions = []
-    for doctor in all_doctors:
-        if doctor.notification_preferences.get("report_ready", True):
-            distribution = await distribute_report_to_doctor(
-                db=db,
-                lab_result=lab_result,
-                doctor=doctor,
-                branch_id=lab_result.branch_id,
-                delivery_methods=delivery_methods,
-                priority=priority,
-                created_by=current_user.id
-            )
-            distributions.append(distribution.id)
+    existing, created = await create_distributions(
+        db, lab_result, recipients, delivery_methods, priority, current_user.id
+    )
+    
+    distributions = [
+        (existing.get(doctor.id) or created[doctor.id]).id for doctor in recipients
+    ]
+    
+    # Email/SMS/WhatsApp sends happen after the response goes out
+    if created:
+        background_tasks.add_task(
+            send_distribution_notifications,
+            lab_result.id,
+            [dist.id for dist in created.values()],
+            delivery_methods
+        )
     
     return {
         "message": "Report distributed to all doctors",
@@ -389,7 +463,8 @@ def get_distributions(
 ):
     """Get list of report distributions with filtering"""
     
-    query = db.query(ReportDistribution)
+    # Plain column rows of the response fields instead of full ORM objects
+    query = db.query(*DISTRIBUTION_LIST_COLUMNS)
     
     # Apply filters
     if doctor_id:
@@ -409,10 +484,10 @@ def get_distributions(
     total = query.count()
     
     # Apply pagination
-    distributions = query.order_by(desc(ReportDistribution.created_at)).offset(skip).limit(limit).all()
+    rows = query.order_by(desc(ReportDistribution.created_at)).offset(skip).limit(limit).all()
     
     return {
-        "distributions": distributions,
+        "distributions": [dict(row._mapping) for row in rows],
         "total": total,
         "page": skip // limit + 1,
         "limit": limit
@@ -479,11 +554,14 @@ def get_pending_reports_for_doctor(
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
-    # Get pending distributions
-    distributions = db.query(ReportDistribution).filter(
+    # Get pending distributions with their lab result and patient in two IN() queries
+    distributions = db.query(ReportDistribution).options(
+        selectinload(ReportDistribution.lab_result),
+        selectinload(ReportDistribution.patient)
+    ).filter(
         and_(
             ReportDistribution.doctor_id == doctor_id,
-            ReportDistribution.delivery_status.in_(["pending", "sent", "delivered"])
+            ReportDistribution.delivery_status.in_(UNREAD_REPORT_STATUSES)
         )
     ).order_by(
         desc(ReportDistribution.priority),
@@ -491,17 +569,12 @@ def get_pending_reports_for_doctor(
     ).limit(limit).all()
     
     # Get unread count
-    unread_count = db.query(func.count(ReportDistribution.id)).filter(
-        and_(
-            ReportDistribution.doctor_id == doctor_id,
-            ReportDistribution.delivery_status.in_(["pending", "sent", "delivered"])
-        )
-    ).scalar()
+    unread_count = doctor_unread_count(db, doctor_id)
     
     result = []
     for dist in distributions:
-        lab_result = db.query(LabResult).filter(LabResult.id == dist.lab_result_id).first()
-        patient = db.query(Patient).filter(Patient.id == dist.patient_id).first()
+        lab_result = dist.lab_result
+        patient = dist.patient
         
         result.append({
             "distribution_id": dist.id,
@@ -512,8 +585,8 @@ def get_pending_reports_for_doctor(
             "delivery_status": dist.delivery_status,
             "created_at": dist.created_at,
             "patient": {
-                "name": f"{patient.first_name} {patient.last_name}" if patient else "Unknown",
-                "phone": patient.phone if patient else None
+                "name": f"{patient.first_name} {patient.last_name}",
+                "phone": patient.phone
             } if patient else None,
             "lab_result": {
                 "id": lab_result.id,
@@ -537,13 +610,11 @@ async def acknowledge_report(
     distribution_id: int,
     action: str = Query("view", regex="^(view|download|print|acknowledge)$"),
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Acknowledge that a doctor has viewed/downloaded a report"""
     
-    distribution = db.query(ReportDistribution).filter(
-        ReportDistribution.id == distribution_id
-    ).first()
+    distribution = await db.get(ReportDistribution, distribution_id)
     
     if not distribution:
         raise HTTPException(status_code=404, detail="Distribution not found")
@@ -563,7 +634,8 @@ async def acknowledge_report(
         distribution.acknowledged_at = now
         distribution.delivery_status = "read"
     
-    db.commit()
+    await db.commit()
+    await cache.invalidate_doctor_dashboard(distribution.doctor_id)
     
     return {
         "message": f"Report {action} acknowledged",
@@ -584,7 +656,18 @@ def get_distribution_summary(
 ):
     """Get summary statistics for report distributions"""
     
-    query = db.query(ReportDistribution)
+    def status_count(value):
+        return func.coalesce(func.sum(case((ReportDistribution.delivery_status == value, 1), else_=0)), 0)
+    
+    # Total and status breakdown in a single row
+    query = db.query(
+        func.count(ReportDistribution.id).label("total"),
+        status_count("pending").label("pending"),
+        status_count("sent").label("sent"),
+        status_count("delivered").label("delivered"),
+        status_count("read").label("read"),
+        status_count("failed").label("failed")
+    )
     
     if doctor_id:
         query = query.filter(ReportDistribution.doctor_id == doctor_id)
@@ -595,14 +678,13 @@ def get_distribution_summary(
     if end_date:
         query = query.filter(ReportDistribution.created_at <= end_date)
     
-    total = query.count()
-    
-    # Status breakdown
-    pending = query.filter(ReportDistribution.delivery_status == "pending").count()
-    sent = query.filter(ReportDistribution.delivery_status == "sent").count()
-    delivered = query.filter(ReportDistribution.delivery_status == "delivered").count()
-    read = query.filter(ReportDistribution.delivery_status == "read").count()
-    failed = query.filter(ReportDistribution.delivery_status == "failed").count()
+    counts = query.one()
+    total = counts.total
+    pending = counts.pending
+    sent = counts.sent
+    delivered = counts.delivered
+    read = counts.read
+    failed = counts.failed
     
     # By report type
     by_type = db.query(
@@ -661,7 +743,15 @@ def get_doctor_report_activity(
     ).group_by(ReportDistribution.delivery_status).all()
     
     # Get recent activity
-    recent = db.query(ReportDistribution).filter(
+    recent = db.query(
+        ReportDistribution.id,
+        ReportDistribution.report_name,
+        ReportDistribution.report_type,
+        ReportDistribution.delivery_status.label("status"),
+        ReportDistribution.created_at,
+        ReportDistribution.viewed_at,
+        ReportDistribution.downloaded_at
+    ).filter(
         and_(
             ReportDistribution.doctor_id == doctor_id,
             ReportDistribution.created_at >= start_date
@@ -693,18 +783,7 @@ def get_doctor_report_activity(
             {"date": str(d[0]), "count": d[1]}
             for d in daily
         ],
-        "recent_reports": [
-            {
-                "id": r.id,
-                "report_name": r.report_name,
-                "report_type": r.report_type,
-                "status": r.delivery_status,
-                "created_at": r.created_at,
-                "viewed_at": r.viewed_at,
-                "downloaded_at": r.downloaded_at
-            }
-            for r in recent
-        ]
+        "recent_reports": [dict(r._mapping) for r in recent]
     }
 
 
@@ -712,20 +791,18 @@ def get_doctor_report_activity(
 async def send_report_reminder(
     distribution_id: int,
     current_user: User = Depends(require_staff),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Send a reminder notification for a pending report"""
     
-    distribution = db.query(ReportDistribution).filter(
-        ReportDistribution.id == distribution_id
-    ).first()
+    distribution = await db.get(ReportDistribution, distribution_id)
     
     if not distribution:
         raise HTTPException(status_code=404, detail="Distribution not found")
     
-    doctor = db.query(Doctor).filter(Doctor.id == distribution.doctor_id).first()
-    lab_result = db.query(LabResult).filter(LabResult.id == distribution.lab_result_id).first()
-    patient = db.query(Patient).filter(Patient.id == distribution.patient_id).first()
+    doctor = await db.get(Doctor, distribution.doctor_id)
+    lab_result = await db.get(LabResult, distribution.lab_result_id)
+    patient = await db.get(Patient, distribution.patient_id)
     
     if not doctor or not lab_result or not patient:
         raise HTTPException(status_code=404, detail="Related records not found")
@@ -744,7 +821,7 @@ async def send_report_reminder(
     
     # Create notification record
     notification = DoctorNotification(
-        notification_id=f"NT-REM-{uuid.uuid4().hex[:8].upper()}",
+        notification_id=f"NT-REM-{secrets.token_hex(4).upper()}",
         doctor_id=doctor.id,
         notification_type="report_reminder",
         title="Report Reminder",
@@ -757,7 +834,7 @@ async def send_report_reminder(
         reference_type="report_distribution"
     )
     db.add(notification)
-    db.commit()
+    await db.commit()
     
     return {
         "message": "Reminder sent successfully",
@@ -774,16 +851,20 @@ def track_report_distribution(
 ):
     """Track all distributions for a specific lab result"""
     
-    lab_result = db.query(LabResult).filter(LabResult.id == lab_result_id).first()
+    lab_result = db.get(LabResult, lab_result_id)
     
     if not lab_result:
         raise HTTPException(status_code=404, detail="Lab result not found")
     
-    distributions = db.query(ReportDistribution).filter(
+    # Doctors come in one IN() query; any other lazy load is a bug, so raise
+    distributions = db.query(ReportDistribution).options(
+        selectinload(ReportDistribution.doctor),
+        raiseload("*")
+    ).filter(
         ReportDistribution.lab_result_id == lab_result_id
     ).all()
     
-    patient = db.query(Patient).filter(Patient.id == lab_result.patient_id).first()
+    patient = db.get(Patient, lab_result.patient_id) if lab_result.patient_id else None
     
     result = {
         "lab_result": {
@@ -801,7 +882,7 @@ def track_report_distribution(
     }
     
     for dist in distributions:
-        doctor = db.query(Doctor).filter(Doctor.id == dist.doctor_id).first()
+        doctor = dist.doctor
         
         result["distributions"].append({
             "distribution_id": dist.distribution_id,
@@ -1,17 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy import and_, or_, desc, func, tuple_, update, insert, select
 from typing import List, Optional
-from datetime import datetime, timedelta, time
-from decimal import Decimal
+from threading import Lock
+from cachetools import TTLCache
+import hashlib
+import orjson
+from datetime import datetime
+from enum import Enum
 
 from app.utils.database import get_db
-from app.utils.auth_system import auth_guard, require_staff, get_current_user
+from app.utils.auth_system import auth_guard, require_staff
+from app.utils.date_ranges import day_bounds, month_bounds
+from app.utils.pagination import decode_cursor, set_next_cursor
 from app.models import User, Branch, Staff, AttendanceRecord, SalaryRecord
 from pydantic import BaseModel, Field
-from datetime import time as dt_time
 
 # Pydantic models for staff management
+class AttendanceStatus(str, Enum):
+    PRESENT = "present"
+    ABSENT = "absent"
+    LATE = "late"
+    HALF_DAY = "half_day"
+    LEAVE = "leave"
+
+class PaymentMode(str, Enum):
+    CASH = "cash"
+    CARD = "card"
+    ONLINE = "online"
+    CHEQUE = "cheque"
+
 class StaffCreate(BaseModel):
     user_id: int
     department: str = Field(..., min_length=1, max_length=100)
@@ -70,18 +89,31 @@ class AttendanceRecordCreate(BaseModel):
     attendance_date: datetime
     check_in_time: Optional[datetime] = None
     check_out_time: Optional[datetime] = None
-    status: str = Field(default="present", pattern=r"^(present|absent|late|half_day|leave)$")
+    status: AttendanceStatus = AttendanceStatus.PRESENT
     late_minutes: int = Field(default=0, ge=0)
     overtime_minutes: int = Field(default=0, ge=0)
     notes: Optional[str] = None
+    
+    class Config:
+        use_enum_values = True
+        validate_default = True
+
+class AttendanceBulkItem(AttendanceRecordCreate):
+    staff_id: int
+
+class AttendanceBulkCreate(BaseModel):
+    items: List[AttendanceBulkItem] = Field(..., min_length=1, max_length=500)
 
 class AttendanceRecordUpdate(BaseModel):
     check_in_time: Optional[datetime] = None
     check_out_time: Optional[datetime] = None
-    status: Optional[str] = None
+    status: Optional[AttendanceStatus] = None
     late_minutes: Optional[int] = None
     overtime_minutes: Optional[int] = None
     notes: Optional[str] = None
+    
+    class Config:
+        use_enum_values = True
 
 class AttendanceRecordResponse(BaseModel):
     id: int
@@ -110,7 +142,10 @@ class SalaryRecordCreate(BaseModel):
     base_salary: float = Field(..., gt=0)
     bonus: float = Field(default=0, ge=0)
     deductions: float = Field(default=0, ge=0)
-    payment_mode: Optional[str] = Field(None, pattern=r"^(cash|card|online|cheque)$")
+    payment_mode: Optional[PaymentMode] = None
+    
+    class Config:
+        use_enum_values = True
 
 class SalaryRecordResponse(BaseModel):
     id: int
@@ -135,7 +170,16 @@ class SalaryRecordResponse(BaseModel):
     class Config:
         from_attributes = True
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Department lists change only when staff are created or edited: keep the
+# serialized body per branch for a few minutes and clear it on those writes
+_departments_cache = TTLCache(maxsize=64, ttl=300)
+_departments_lock = Lock()
+
+def invalidate_departments_cache():
+    with _departments_lock:
+        _departments_cache.clear()
 
 @router.post("/staff/", response_model=StaffResponse)
 def create_staff(
@@ -146,7 +190,7 @@ def create_staff(
     """Create a new staff member"""
     
     # Check if user exists
-    user = db.query(User).filter(User.id == staff_data.user_id).first()
+    user = db.get(User, staff_data.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -155,7 +199,7 @@ def create_staff(
         staff_data.branch_id = current_user.branch_id
     
     # Generate employee ID
-    branch = db.query(Branch).filter(Branch.id == staff_data.branch_id).first()
+    branch = db.get(Branch, staff_data.branch_id)
     if not branch:
         raise HTTPException(status_code=404, detail="Branch not found")
     
@@ -197,6 +241,8 @@ def create_staff(
     db.commit()
     db.refresh(db_staff)
     
+    invalidate_departments_cache()
+    
     # Log activity
     auth_guard.log_activity(
         db=db,
@@ -261,7 +307,7 @@ def get_staff(
 ):
     """Get staff member by ID"""
     
-    staff = db.query(Staff).filter(Staff.id == staff_id).join(User).join(Branch).first()
+    staff = db.get(Staff, staff_id)
     
     if not staff:
         raise HTTPException(status_code=404, detail="Staff member not found")
@@ -281,7 +327,7 @@ def update_staff(
 ):
     """Update staff member information"""
     
-    staff = db.query(Staff).filter(Staff.id == staff_id).first()
+    staff = db.get(Staff, staff_id)
     
     if not staff:
         raise HTTPException(status_code=404, detail="Staff member not found")
@@ -297,6 +343,8 @@ def update_staff(
     db.commit()
     db.refresh(staff)
     
+    invalidate_departments_cache()
+    
     # Log activity
     auth_guard.log_activity(
         db=db,
@@ -317,7 +365,7 @@ def deactivate_staff(
 ):
     """Deactivate staff member (soft delete)"""
     
-    staff = db.query(Staff).filter(Staff.id == staff_id).first()
+    staff = db.get(Staff, staff_id)
     
     if not staff:
         raise HTTPException(status_code=404, detail="Staff member not found")
@@ -352,7 +400,7 @@ def create_attendance_record(
 ):
     """Create attendance record for staff"""
     
-    staff = db.query(Staff).filter(Staff.id == staff_id).join(User).join(Branch).first()
+    staff = db.get(Staff, staff_id)
     
     if not staff:
         raise HTTPException(status_code=404, detail="Staff member not found")
@@ -362,11 +410,12 @@ def create_attendance_record(
         raise HTTPException(status_code=403, detail="Access denied to this staff member")
     
     # Check for existing attendance record for the same date
-    existing_record = db.query(AttendanceRecord).filter(
+    day_start, day_end = day_bounds(attendance_data.attendance_date)
+    existing_record = db.query(AttendanceRecord.id).filter(
         and_(
             AttendanceRecord.staff_id == staff_id,
-            AttendanceRecord.attendance_date >= attendance_data.attendance_date.date(),
-            AttendanceRecord.attendance_date < attendance_data.attendance_date.date() + timedelta(days=1)
+            AttendanceRecord.attendance_date >= day_start,
+            AttendanceRecord.attendance_date < day_end
         )
     ).first()
     
@@ -405,31 +454,89 @@ def create_attendance_record(
     
     return db_attendance
 
-@router.get("/attendance/", response_model=List[AttendanceRecordResponse])
-def get_attendance_records(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    staff_id: Optional[int] = Query(None),
-    start_date: Optional[datetime] = Query(None),
-    end_date: Optional[datetime] = Query(None),
-    status: Optional[str] = Query(None),
-    branch_id: Optional[int] = Query(None),
+@router.post("/attendance/bulk")
+def create_attendance_records_bulk(
+    bulk_data: AttendanceBulkCreate,
     current_user: User = Depends(require_staff),
     db: Session = Depends(get_db)
 ):
-    """Get attendance records with filtering"""
+    """Create attendance records for several staff/days in one INSERT"""
     
-    # Filter by branch access
+    items = bulk_data.items
+    staff_ids = {item.staff_id for item in items}
+    
+    # Check that every staff member exists and is accessible
+    staff_branches = dict(
+        db.query(Staff.id, Staff.branch_id).filter(Staff.id.in_(staff_ids)).all()
+    )
+    
+    missing = staff_ids - staff_branches.keys()
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Staff members not found: {sorted(missing)}")
+    
+    if current_user.role != 'super_admin' and any(
+        branch != current_user.branch_id for branch in staff_branches.values()
+    ):
+        raise HTTPException(status_code=403, detail="Access denied to one or more staff members")
+    
+    # Check for duplicates within the payload and against existing records
+    keys = [(item.staff_id, item.attendance_date.date()) for item in items]
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail="Duplicate staff/date pairs in request")
+    
+    range_start = day_bounds(min(item.attendance_date for item in items))[0]
+    range_end = day_bounds(max(item.attendance_date for item in items))[1]
+    existing = db.query(AttendanceRecord.staff_id, AttendanceRecord.attendance_date).filter(
+        and_(
+            AttendanceRecord.staff_id.in_(staff_ids),
+            AttendanceRecord.attendance_date >= range_start,
+            AttendanceRecord.attendance_date < range_end
+        )
+    ).all()
+    
+    conflicts = set(keys) & {(r.staff_id, r.attendance_date.date()) for r in existing}
+    if conflicts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Attendance record already exists for {len(conflicts)} staff/date pair(s)"
+        )
+    
+    # Create attendance records with a single multi-row INSERT
+    rows = [
+        {**item.model_dump(), "approved_by": current_user.id}
+        for item in items
+    ]
+    created_ids = db.scalars(insert(AttendanceRecord).returning(AttendanceRecord.id), rows).all()
+    db.commit()
+    
+    # Log activity
+    auth_guard.log_activity(
+        db=db,
+        user=current_user,
+        action="create",
+        entity_type="attendance_record",
+        entity_id=created_ids[0],
+        description=f"Bulk created {len(created_ids)} attendance records"
+    )
+    
+    return {"message": "Attendance records created successfully", "created": len(created_ids), "ids": created_ids}
+
+def filter_attendance(
+    query,
+    current_user: User,
+    staff_id: Optional[int],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    status: Optional[AttendanceStatus],
+    branch_id: Optional[int]
+):
+    """Apply branch access and the attendance list filters to a query joined to Staff"""
     if current_user.role == 'super_admin':
-        query = db.query(AttendanceRecord).join(Staff).join(User).join(Branch)
         if branch_id:
             query = query.filter(Staff.branch_id == branch_id)
     else:
-        query = db.query(AttendanceRecord).join(Staff).join(User).join(Branch).filter(
-            Staff.branch_id == current_user.branch_id
-        )
+        query = query.filter(Staff.branch_id == current_user.branch_id)
     
-    # Apply filters
     if staff_id:
         query = query.filter(AttendanceRecord.staff_id == staff_id)
     if start_date:
@@ -437,12 +544,77 @@ def get_attendance_records(
     if end_date:
         query = query.filter(AttendanceRecord.attendance_date <= end_date)
     if status:
-        query = query.filter(AttendanceRecord.status == status)
+        query = query.filter(AttendanceRecord.status == status.value)
+    return query
+
+@router.get("/attendance/", response_model=List[AttendanceRecordResponse])
+def get_attendance_records(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    staff_id: Optional[int] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    status: Optional[AttendanceStatus] = Query(None),
+    branch_id: Optional[int] = Query(None),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """Get attendance records with filtering"""
+    
+    # Project just the response columns, staff details joined in
+    query = db.query(
+        AttendanceRecord.id,
+        AttendanceRecord.staff_id,
+        AttendanceRecord.attendance_date,
+        AttendanceRecord.check_in_time,
+        AttendanceRecord.check_out_time,
+        AttendanceRecord.status,
+        AttendanceRecord.late_minutes,
+        AttendanceRecord.overtime_minutes,
+        AttendanceRecord.notes,
+        AttendanceRecord.approved_by,
+        AttendanceRecord.created_at,
+        Staff.employee_id,
+        (User.first_name + " " + User.last_name).label("staff_name"),
+        Staff.department
+    ).join(Staff, AttendanceRecord.staff_id == Staff.id).join(User, Staff.user_id == User.id)
+    
+    query = filter_attendance(query, current_user, staff_id, start_date, end_date, status, branch_id)
+    query = query.order_by(desc(AttendanceRecord.attendance_date), desc(AttendanceRecord.id))
+    
+    # Keyset pagination when a cursor is given; skip stays for existing clients
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(
+            tuple_(AttendanceRecord.attendance_date, AttendanceRecord.id) < tuple_(last_date, last_id)
+        )
+    else:
+        query = query.offset(skip)
     
-    records = query.order_by(desc(AttendanceRecord.attendance_date)).offset(skip).limit(limit).all()
+    records = query.limit(limit).all()
+    set_next_cursor(response, records, limit, "attendance_date", "id")
     
     return records
 
+@router.get("/attendance/count")
+def count_attendance_records(
+    staff_id: Optional[int] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    status: Optional[AttendanceStatus] = Query(None),
+    branch_id: Optional[int] = Query(None),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db)
+):
+    """Count attendance records matching the list filters"""
+    
+    query = db.query(func.count(AttendanceRecord.id)).join(Staff, AttendanceRecord.staff_id == Staff.id)
+    query = filter_attendance(query, current_user, staff_id, start_date, end_date, status, branch_id)
+    
+    return {"total": query.scalar()}
+
 @router.put("/attendance/{attendance_id}", response_model=AttendanceRecordResponse)
 def update_attendance_record(
     attendance_id: int,
@@ -452,7 +624,7 @@ def update_attendance_record(
 ):
     """Update attendance record"""
     
-    attendance = db.query(AttendanceRecord).filter(AttendanceRecord.id == attendance_id).join(Staff).join(User).join(Branch).first()
+    attendance = db.get(AttendanceRecord, attendance_id)
     
     if not attendance:
         raise HTTPException(status_code=404, detail="Attendance record not found")
@@ -491,46 +663,51 @@ def get_attendance_summary(
 ):
     """Get attendance summary for a specific month"""
     
+    # Per-status counts and minute totals, aggregated in the database
+    query = db.query(
+        AttendanceRecord.status,
+        func.count(AttendanceRecord.id).label("days"),
+        func.coalesce(func.sum(AttendanceRecord.late_minutes), 0).label("late_minutes"),
+        func.coalesce(func.sum(AttendanceRecord.overtime_minutes), 0).label("overtime_minutes")
+    ).join(Staff).join(User).join(Branch)
+    
     # Filter by branch access
     if current_user.role == 'super_admin':
-        query = db.query(AttendanceRecord).join(Staff).join(User).join(Branch)
         if branch_id:
             query = query.filter(Staff.branch_id == branch_id)
     else:
-        query = db.query(AttendanceRecord).join(Staff).join(User).join(Branch).filter(
-            Staff.branch_id == current_user.branch_id
-        )
+        query = query.filter(Staff.branch_id == current_user.branch_id)
     
     # Date range for the month
-    start_date = datetime(year, month, 1)
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+    start_date, end_date = month_bounds(year, month)
     
     query = query.filter(
         and_(
             AttendanceRecord.attendance_date >= start_date,
-            AttendanceRecord.attendance_date <= end_date
+            AttendanceRecord.attendance_date < end_date
         )
     )
     
     if staff_id:
         query = query.filter(AttendanceRecord.staff_id == staff_id)
     
-    records = query.all()
+    by_status = {row.status: row for row in query.group_by(AttendanceRecord.status).all()}
+    
+    def days(status):
+        row = by_status.get(status)
+        return row.days if row else 0
     
     # Calculate summary
     summary = {
         "period": f"{year}-{month:02d}",
-        "total_records": len(records),
-        "present_days": len([r for r in records if r.status == "present"]),
-        "absent_days": len([r for r in records if r.status == "absent"]),
-        "late_days": len([r for r in records if r.status == "late"]),
-        "half_days": len([r for r in records if r.status == "half_day"]),
-        "leave_days": len([r for r in records if r.status == "leave"]),
-        "total_late_minutes": sum(r.late_minutes for r in records),
-        "total_overtime_minutes": sum(r.overtime_minutes for r in records)
+        "total_records": sum(row.days for row in by_status.values()),
+        "present_days": days("present"),
+        "absent_days": days("absent"),
+        "late_days": days("late"),
+        "half_days": days("half_day"),
+        "leave_days": days("leave"),
+        "total_late_minutes": sum(row.late_minutes for row in by_status.values()),
+        "total_overtime_minutes": sum(row.overtime_minutes for row in by_status.values())
     }
     
     return summary
@@ -545,7 +722,7 @@ def create_salary_record(
 ):
     """Create salary record for staff"""
     
-    staff = db.query(Staff).filter(Staff.id == staff_id).join(User).join(Branch).first()
+    staff = db.get(Staff, staff_id)
     
     if not staff:
         raise HTTPException(status_code=404, detail="Staff member not found")
@@ -569,10 +746,6 @@ def create_salary_record(
             detail="Salary record already exists for this month/year"
         )
     
-    # Calculate gross and net salary
-    gross_salary = salary_data.base_salary + salary_data.bonus
-    net_salary = gross_salary - salary_data.deductions
-    
     # Create salary record
     db_salary = SalaryRecord(
         staff_id=staff_id,
@@ -581,8 +754,6 @@ def create_salary_record(
         base_salary=salary_data.base_salary,
         bonus=salary_data.bonus,
         deductions=salary_data.deductions,
-        gross_salary=gross_salary,
-        net_salary=net_salary,
         payment_mode=salary_data.payment_mode
     )
     
@@ -615,25 +786,43 @@ def get_salary_records(
 ):
     """Get salary records with filtering"""
     
+    # Select the response columns directly, staff details joined in
+    query = select(
+        SalaryRecord.id,
+        SalaryRecord.staff_id,
+        SalaryRecord.month,
+        SalaryRecord.year,
+        SalaryRecord.base_salary,
+        SalaryRecord.bonus,
+        SalaryRecord.deductions,
+        SalaryRecord.gross_salary,
+        SalaryRecord.net_salary,
+        SalaryRecord.payment_date,
+        SalaryRecord.payment_status,
+        SalaryRecord.payment_mode,
+        SalaryRecord.created_at,
+        Staff.employee_id,
+        (User.first_name + " " + User.last_name).label("staff_name"),
+        Staff.department
+    ).join(Staff, SalaryRecord.staff_id == Staff.id).join(User, Staff.user_id == User.id)
+    
     # Filter by branch access
     if current_user.role == 'super_admin':
-        query = db.query(SalaryRecord).join(Staff).join(User).join(Branch)
         if branch_id:
-            query = query.filter(Staff.branch_id == branch_id)
+            query = query.where(Staff.branch_id == branch_id)
     else:
-        query = db.query(SalaryRecord).join(Staff).join(User).join(Branch).filter(
-            Staff.branch_id == current_user.branch_id
-        )
+        query = query.where(Staff.branch_id == current_user.branch_id)
     
     # Apply filters
     if staff_id:
-        query = query.filter(SalaryRecord.staff_id == staff_id)
+        query = query.where(SalaryRecord.staff_id == staff_id)
     if year:
-        query = query.filter(SalaryRecord.year == year)
+        query = query.where(SalaryRecord.year == year)
     if month:
-        query = query.filter(SalaryRecord.month == month)
+        query = query.where(SalaryRecord.month == month)
     
-    records = query.order_by(desc(SalaryRecord.year), desc(SalaryRecord.month)).offset(skip).limit(limit).all()
+    query = query.order_by(desc(SalaryRecord.year), desc(SalaryRecord.month)).offset(skip).limit(limit)
+    records = db.execute(query).mappings().all()
     
     return records
 
@@ -645,19 +834,25 @@ def mark_salary_as_paid(
 ):
     """Mark salary as paid"""
     
-    salary = db.query(SalaryRecord).filter(SalaryRecord.id == salary_id).join(Staff).join(User).join(Branch).first()
+    # Mark as paid in one UPDATE ... FROM staff, branch access checked in the WHERE clause
+    stmt = (
+        update(SalaryRecord)
+        .where(SalaryRecord.id == salary_id, SalaryRecord.staff_id == Staff.id)
+        .values(payment_status="paid", payment_date=datetime.utcnow())
+        .returning(SalaryRecord.id, Staff.employee_id)
+        .execution_options(synchronize_session=False)
+    )
+    if current_user.role != 'super_admin':
+        stmt = stmt.where(Staff.branch_id == current_user.branch_id)
     
-    if not salary:
-        raise HTTPException(status_code=404, detail="Salary record not found")
+    salary = db.execute(stmt).first()
     
-    # Check branch access
-    if current_user.role != 'super_admin' and salary.staff.branch_id != current_user.branch_id:
+    if not salary:
+        # Nothing updated: tell a missing record apart from one in another branch
+        if db.get(SalaryRecord, salary_id) is None:
+            raise HTTPException(status_code=404, detail="Salary record not found")
         raise HTTPException(status_code=403, detail="Access denied to this salary record")
     
-    # Mark as paid
-    salary.payment_status = "paid"
-    salary.payment_date = datetime.utcnow()
-    
     db.commit()
     
     # Log activity
@@ -667,13 +862,14 @@ def mark_salary_as_paid(
         action="update",
         entity_type="salary_record",
         entity_id=salary.id,
-        description=f"Marked salary as paid for {salary.staff.employee_id}"
+        description=f"Marked salary as paid for {salary.employee_id}"
     )
     
     return {"message": "Salary marked as paid successfully"}
 
 @router.get("/departments")
 def get_departments(
+    request: Request,
     branch_id: Optional[int] = Query(None),
     current_user: User = Depends(require_staff),
     db: Session = Depends(get_db)
@@ -681,15 +877,27 @@ def get_departments(
     """Get list of departments"""
     
     # Filter by branch access
-    if current_user.role == 'super_admin':
-        query = db.query(Staff.department).distinct()
-        if branch_id:
-            query = query.filter(Staff.branch_id == branch_id)
-    else:
-        query = db.query(Staff.department).filter(
-            Staff.branch_id == current_user.branch_id
-        ).distinct()
+    restricted = current_user.role != 'super_admin'
+    if restricted:
+        branch_id = current_user.branch_id
+    cache_key = (branch_id, restricted)
     
-    departments = query.all()
+    with _departments_lock:
+        cached = _departments_cache.get(cache_key)
     
-    return [{"department": dept[0]} for dept in departments]
+    if cached is None:
+        query = db.query(Staff.department).distinct()
+        if restricted or branch_id:
+            query = query.filter(Staff.branch_id == branch_id)
+        
+        body = orjson.dumps([{"department": dept[0]} for dept in query.all()])
+        cached = (body, '"%s"' % hashlib.sha1(body).hexdigest())
+        with _departments_lock:
+            _departments_cache[cache_key] = cached
+    
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,17 +1,15 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.utils.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.database import get_db, get_async_db
+from app.utils.pagination import decode_cursor, set_next_cursor
 from app.models.test_entry import TestEntry
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/tests/")
 def create_test(test_name: str, price: float, patient_id: int, result: str = "", db: Session = Depends(get_db)):
     test = TestEntry(test_name=test_name, price=price, patient_id=patient_id, result=result)
@@ -21,5 +19,17 @@ def create_test(test_name: str, price: float, patient_id: int, result: str = "",
     return test
 
 @router.get("/tests/")
-def list_tests(db: Session = Depends(get_db)):
-    return db.query(TestEntry).all()
\ No newline at end of file
+async def list_tests(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Newest first, keyset paginated on the primary key
+    query = select(TestEntry)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(TestEntry.id < last_id)
+    tests = (await db.scalars(query.order_by(TestEntry.id.desc()).limit(limit))).all()
+    set_next_cursor(response, tests, limit, "id")
+    return tests
\ No newline at end of file
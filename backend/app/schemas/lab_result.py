@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class LabResultCreate(BaseModel):
     test_name: str
@@ -8,6 +8,9 @@ class LabResultCreate(BaseModel):
     invoice_id: int
     patient_id: int
 
+class LabResultBulkCreate(BaseModel):
+    results: list[LabResultCreate] = Field(..., min_length=1, max_length=500)
+
 class LabResultResponse(BaseModel):
     id: int
     test_name: str
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -111,6 +111,19 @@ class PatientResponse(PatientBase):
     class Config:
         from_attributes = True
 
+class PatientListItem(BaseModel):
+    """Columns shown in patient lists; full details come from GET /patients/{id}"""
+    id: int
+    patient_id: str
+    branch_id: int
+    first_name: str
+    last_name: str
+    phone: str
+    registration_date: datetime
+    
+    class Config:
+        from_attributes = True
+
 class DailyEntryBase(BaseModel):
     entry_date: datetime
     doctor_name: str = Field(..., min_length=2)
@@ -132,6 +145,10 @@ class DailyEntryBase(BaseModel):
 class DailyEntryCreate(DailyEntryBase):
     patient_id: Optional[int] = None
 
+class DailyEntryBulkCreate(BaseModel):
+    branch_id: Optional[int] = None  # Required for super admins; others use their own branch
+    entries: List[DailyEntryCreate] = Field(..., min_length=1, max_length=500)
+
 class DailyEntryUpdate(BaseModel):
     payment_status: Optional[str] = None
     payment_mode: Optional[str] = None
@@ -153,6 +170,24 @@ class DailyEntryResponse(DailyEntryBase):
     class Config:
         from_attributes = True
 
+class DailyEntryListItem(BaseModel):
+    """Columns shown in daily entry lists; full details come from GET /daily-entries/{id}"""
+    id: int
+    branch_id: int
+    patient_id: Optional[int]
+    entry_date: datetime
+    doctor_name: str
+    patient_name: str
+    patient_mobile: str
+    test_names: str
+    consultation_fee: float
+    total_amount: float
+    amount_paid: float
+    payment_status: str
+    
+    class Config:
+        from_attributes = True
+
 class MonthlyReportRequest(BaseModel):
     year: int = Field(..., ge=2020, le=2030)
     month: int = Field(..., ge=1, le=12)
@@ -162,5 +197,7 @@ class MonthlyReportRequest(BaseModel):
 class ExportResponse(BaseModel):
     success: bool
     message: str
+    job_id: Optional[str] = None
+    status: Optional[str] = None
     file_path: Optional[str] = None
     download_url: Optional[str] = None
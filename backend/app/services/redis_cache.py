@@ -63,6 +63,8 @@ class RedisCache:
             return True
         except Exception as e:
             print(f"Redis connection failed: {e}")
+            # Run without a cache rather than retrying on every request
+            self._client = None
             return False
 
     async def disconnect(self):
@@ -126,7 +128,7 @@ class RedisCache:
         if not self._client:
             return 0
         try:
-            keys = await self._client.keys(pattern)
+            keys = [key async for key in self._client.scan_iter(match=pattern, count=500)]
             if keys:
                 return await self._client.delete(*keys)
             return 0
@@ -210,6 +212,27 @@ class RedisCache:
         key = f"inventory:{item_id}"
         return await self.delete(key)
 
+    async def get_inventory_listing(self, scope: Any) -> Optional[Dict]:
+        """Get cached default inventory listing for a branch (or "all")"""
+        key = f"inventory:list:{scope}"
+        return await self.get(key)
+
+    async def set_inventory_listing(self, scope: Any, data: Dict) -> bool:
+        """Cache default inventory listing; kept short since it is polled"""
+        key = f"inventory:list:{scope}"
+        return await self.set(key, data, ttl=10, category="inventory")
+
+    async def invalidate_inventory_listing(self, branch_id: int) -> bool:
+        """Drop the cached listings that include a branch's items"""
+        if not self._client:
+            return False
+        try:
+            await self._client.delete(f"inventory:list:{branch_id}", "inventory:list:all")
+            return True
+        except Exception as e:
+            print(f"Cache delete error: {e}")
+            return False
+
     async def get_doctor(self, doctor_id: int) -> Optional[Dict]:
         """Get cached doctor data"""
         key = f"doctor:{doctor_id}"
@@ -225,6 +248,32 @@ class RedisCache:
         key = f"doctor:{doctor_id}"
         return await self.delete(key)
 
+    async def get_doctor_dashboard(self, doctor_id: int, days: int) -> Optional[Dict]:
+        """Get cached doctor portal dashboard"""
+        key = f"doctor:dashboard:{doctor_id}:{days}"
+        return await self.get(key)
+
+    async def set_doctor_dashboard(self, doctor_id: int, days: int, data: Dict) -> bool:
+        """Cache doctor portal dashboard"""
+        key = f"doctor:dashboard:{doctor_id}:{days}"
+        return await self.set(key, data, ttl=30, category="doctor")
+
+    async def invalidate_doctor_dashboard(self, doctor_id: int) -> int:
+        """Delete all cached dashboard windows for a doctor"""
+        return await self.delete_pattern(f"doctor:dashboard:{doctor_id}:*")
+
+    async def get_doctor_specializations(self) -> Optional[List]:
+        """Get cached specialization list with active doctor counts"""
+        return await self.get("doctor:specializations")
+
+    async def set_doctor_specializations(self, data: List) -> bool:
+        """Cache specialization list; cleared whenever a doctor is written"""
+        return await self.set("doctor:specializations", data, ttl=300, category="doctor")
+
+    async def invalidate_doctor_specializations(self) -> bool:
+        """Delete cached specialization list"""
+        return await self.delete("doctor:specializations")
+
     # === Session Management ===
 
     async def set_session(self, session_id: str, data: Dict, ttl: int = 86400) -> bool:
@@ -0,0 +1,128 @@
+import pytest
+from datetime import datetime
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.main import app
+from app.models import Branch, User, Staff
+from app.utils.auth_system import require_staff
+from app.utils.database import Base, get_db, get_async_db
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    """SQLite file shared by the sync and async engines of one test"""
+    return f"{tmp_path}/test.db"
+
+
+@pytest.fixture
+def session_factory(db_url):
+    engine = create_engine(f"sqlite:///{db_url}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def async_engine(db_url):
+    """Engine behind get_async_db, which the inventory routes use"""
+    return create_async_engine(f"sqlite+aiosqlite:///{db_url}")
+
+
+@pytest.fixture
+def async_queries(async_engine):
+    """Statements sent through the async engine, recorded as they execute"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def client(session_factory, async_engine):
+    """TestClient on the SQLite database, authenticated as whichever user `login` picks"""
+    async_session_factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    current = {}
+
+    def override_get_db():
+        with session_factory() as session:
+            yield session
+
+    async def override_get_async_db():
+        async with async_session_factory() as session:
+            yield session
+
+    def override_require_staff(db: Session = Depends(get_db)):
+        return db.get(User, current["user_id"])
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[require_staff] = override_require_staff
+
+    test_client = TestClient(app)
+    test_client.login = lambda user: current.update(user_id=user.id)
+    yield test_client
+
+    app.dependency_overrides.clear()
+
+
+def make_branch(db, name):
+    branch = Branch(
+        name=name, location=name, address=f"{name} Road", city="Patna", state="Bihar",
+        pincode="800001", phone="9000000000", email=f"{name.lower()}@example.com"
+    )
+    db.add(branch)
+    db.flush()
+    return branch
+
+
+def make_user(db, branch, username, role="staff"):
+    user = User(
+        username=username, email=f"{username}@example.com", hashed_password="x",
+        role=role, branch_id=branch.id, first_name=username.title(), last_name="Test",
+        phone="9000000000"
+    )
+    db.add(user)
+    db.flush()
+    return user
+
+
+def make_staff(db, branch, username, department="lab"):
+    user = make_user(db, branch, username)
+    staff = Staff(
+        branch_id=branch.id, user_id=user.id, employee_id=f"EMP-{username}",
+        department=department, position="Technician", date_of_joining=datetime(2024, 1, 1),
+        salary=20000, date_of_birth=datetime(1995, 1, 1)
+    )
+    db.add(staff)
+    db.flush()
+    return staff
+
+
+def walk_cursor(client, url, limit, **params):
+    """Follow X-Next-Cursor from the first page to the last, returning every page"""
+    pages = []
+    cursor = None
+    while True:
+        page_params = dict(params, limit=limit)
+        if cursor:
+            page_params["cursor"] = cursor
+        response = client.get(url, params=page_params)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from app.models import InventoryItem, StockMovement
+from app.tests.conftest import make_branch, make_user, walk_cursor
+
+
+def make_item(db, branch, code, name):
+    item = InventoryItem(
+        branch_id=branch.id, item_code=code, item_name=name, category="reagent",
+        unit="ml", current_stock=50, minimum_stock=10, maximum_stock=100,
+        purchase_price=10, selling_price=15
+    )
+    db.add(item)
+    db.flush()
+    return item
+
+
+def test_inventory_items_cursor_walks_every_item_once(client, db):
+    branch = make_branch(db, "Kankarbagh")
+    user = make_user(db, branch, "storekeeper")
+    # Repeated names so the id tie-breaker decides the order within a name
+    for index, name in enumerate(["Glucose Kit", "Glucose Kit", "Lipid Panel", "Syringe", "Syringe"]):
+        make_item(db, branch, f"ITM-{index}", name)
+    db.commit()
+    client.login(user)
+
+    pages = walk_cursor(client, "/api/inventory/inventory/items/", limit=2)
+    walked = [item["id"] for page in pages for item in page]
+
+    everything = client.get("/api/inventory/inventory/items/", params={"limit": 100}).json()
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert walked == [item["id"] for item in everything]
+    assert len(set(walked)) == 5
+
+
+def test_stock_movements_cursor_walks_every_movement_once(client, db):
+    branch = make_branch(db, "Kankarbagh")
+    user = make_user(db, branch, "storekeeper")
+    item = make_item(db, branch, "ITM-1", "Glucose Kit")
+    start = datetime(2025, 3, 1, 9, 0)
+    for day in range(3):
+        # Two movements per timestamp, so the id tie-breaker is exercised
+        for quantity in (5, 7):
+            db.add(StockMovement(
+                inventory_item_id=item.id, movement_type="consumption", quantity=quantity,
+                previous_stock=50, new_stock=50 - quantity,
+                movement_date=start + timedelta(days=day), created_by=user.id
+            ))
+    db.commit()
+    client.login(user)
+
+    url = f"/api/inventory/inventory/items/{item.id}/stock-movements"
+    pages = walk_cursor(client, url, limit=4)
+    walked = [movement["id"] for page in pages for movement in page]
+
+    everything = client.get(url, params={"limit": 100}).json()
+    assert [len(page) for page in pages] == [4, 2]
+    assert walked == [movement["id"] for movement in everything]
+    assert len(set(walked)) == 6
+
+
+def test_inventory_items_list_issues_one_query(client, db, async_queries):
+    branch = make_branch(db, "Kankarbagh")
+    user = make_user(db, branch, "storekeeper")
+    for index in range(5):
+        make_item(db, branch, f"ITM-{index}", f"Item {index}")
+    db.commit()
+    client.login(user)
+
+    # A non-default limit keeps the Redis listing cache out of the way
+    response = client.get("/api/inventory/inventory/items/", params={"limit": 50})
+
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert len(async_queries) == 1, async_queries
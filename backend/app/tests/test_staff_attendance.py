@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from app.models import AttendanceRecord
+from app.tests.conftest import make_branch, make_user, make_staff, walk_cursor
+
+
+def test_bulk_attendance_rejects_partially_duplicate_batch(client, db):
+    branch = make_branch(db, "Kankarbagh")
+    admin = make_user(db, branch, "manager", role="branch_admin")
+    first = make_staff(db, branch, "asha")
+    second = make_staff(db, branch, "ravi")
+    db.add(AttendanceRecord(staff_id=first.id, attendance_date=datetime(2025, 3, 3, 9, 0)))
+    db.commit()
+    client.login(admin)
+
+    # Ravi's day is new but Asha already has a record for the same date
+    response = client.post("/api/staff/attendance/bulk", json={"items": [
+        {"staff_id": second.id, "attendance_date": "2025-03-03T09:00:00"},
+        {"staff_id": first.id, "attendance_date": "2025-03-03T09:30:00"},
+    ]})
+
+    assert response.status_code == 400
+    assert db.query(AttendanceRecord).count() == 1
+
+
+def test_bulk_attendance_rejects_staff_from_another_branch(client, db):
+    branch = make_branch(db, "Kankarbagh")
+    other_branch = make_branch(db, "Boring Road")
+    admin = make_user(db, branch, "manager", role="branch_admin")
+    own = make_staff(db, branch, "asha")
+    foreign = make_staff(db, other_branch, "ravi")
+    db.commit()
+    client.login(admin)
+
+    response = client.post("/api/staff/attendance/bulk", json={"items": [
+        {"staff_id": own.id, "attendance_date": "2025-03-03T09:00:00"},
+        {"staff_id": foreign.id, "attendance_date": "2025-03-03T09:00:00"},
+    ]})
+
+    assert response.status_code == 403
+    assert db.query(AttendanceRecord).count() == 0
+
+
+def test_bulk_attendance_creates_every_record(client, db):
+    branch = make_branch(db, "Kankarbagh")
+    admin = make_user(db, branch, "manager", role="branch_admin")
+    first = make_staff(db, branch, "asha")
+    second = make_staff(db, branch, "ravi")
+    db.commit()
+    client.login(admin)
+
+    response = client.post("/api/staff/attendance/bulk", json={"items": [
+        {"staff_id": first.id, "attendance_date": "2025-03-03T09:00:00"},
+        {"staff_id": second.id, "attendance_date": "2025-03-03T09:00:00", "status": "late", "late_minutes": 15},
+    ]})
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    assert db.query(AttendanceRecord).filter(AttendanceRecord.approved_by == admin.id).count() == 2
+
+
+def test_attendance_cursor_walks_every_record_once(client, db):
+    branch = make_branch(db, "Kankarbagh")
+    admin = make_user(db, branch, "manager", role="branch_admin")
+    first = make_staff(db, branch, "asha")
+    second = make_staff(db, branch, "ravi")
+    start = datetime(2025, 3, 1, 9, 0)
+    for day in range(3):
+        # Two records per date, so the id tie-breaker is exercised
+        for staff in (first, second):
+            db.add(AttendanceRecord(staff_id=staff.id, attendance_date=start + timedelta(days=day)))
+    db.commit()
+    client.login(admin)
+
+    pages = walk_cursor(client, "/api/staff/attendance/", limit=4)
+    walked = [record["id"] for page in pages for record in page]
+
+    everything = client.get("/api/staff/attendance/", params={"limit": 100}).json()
+    assert [len(page) for page in pages] == [4, 2]
+    assert walked == [record["id"] for record in everything]
+    assert len(set(walked)) == 6
+
+
+def test_attendance_rejects_malformed_cursor(client, db):
+    branch = make_branch(db, "Kankarbagh")
+    admin = make_user(db, branch, "manager", role="branch_admin")
+    db.commit()
+    client.login(admin)
+
+    response = client.get("/api/staff/attendance/", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
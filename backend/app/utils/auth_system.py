@@ -3,16 +3,20 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, OAuth2Pas
 from fastapi.middleware.cors import CORSMiddleware
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from typing import Optional, List, NamedTuple
+from threading import Lock
+from cachetools import TTLCache
 import bcrypt
+import hashlib
 import os
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
-from app.utils.database import get_db
+from app.utils.database import get_db, SessionLocal
 from app.models import User, Branch, ActivityLog
 
 # Security Configuration
@@ -26,6 +30,20 @@ limiter = Limiter(key_func=get_remote_address)
 # Security
 security = HTTPBearer()
 
+# Authenticated users keyed by token hash, so most requests skip the user SELECT.
+# The TTL is short so deactivations and role changes still apply within a minute
+_user_cache = TTLCache(maxsize=10000, ttl=60)
+_user_cache_lock = Lock()
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _detached_copy(user: User) -> User:
+    """Column-only copy of a user that any session can merge without a SELECT"""
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
 class TokenData:
     def __init__(self, username: str = None, branch_id: int = None, role: str = None):
         self.username = username
@@ -81,8 +99,20 @@ class AuthGuard:
                 headers={"WWW-Authenticate": "Bearer"},
             )
     
-    def get_current_user(self, token_data: TokenData = Depends(verify_token), db: Session = Depends(get_db)) -> User:
+    def get_current_user(
+        self,
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        token_data: TokenData = Depends(verify_token),
+        db: Session = Depends(get_db)
+    ) -> User:
         """Get current authenticated user from database"""
+        key = _token_key(credentials.credentials)
+        with _user_cache_lock:
+            cached = _user_cache.get(key)
+        if cached is not None:
+            # Attach a copy to this request's session; no query is emitted
+            return db.merge(cached, load=False)
+        
         user = db.query(User).filter(User.username == token_data.username).first()
         
         if user is None:
@@ -99,8 +129,17 @@ class AuthGuard:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        with _user_cache_lock:
+            _user_cache[key] = _detached_copy(user)
+        
         return user
     
+    def invalidate_user_cache(self, username: str):
+        """Drop cached users for a username, e.g. after a password change or logout"""
+        with _user_cache_lock:
+            for key in [k for k, cached in _user_cache.items() if cached.username == username]:
+                _user_cache.pop(key, None)
+    
     def require_role(self, allowed_roles: List[str]):
         """Decorator to require specific roles"""
         def role_checker(current_user: User = Depends(get_current_user)):
@@ -133,6 +172,22 @@ class AuthGuard:
         )
         db.add(activity)
         db.commit()
+    
+    def log_activity_background(self, user_id: int, action: str, entity_type: str, entity_id: int = None, description: str = ""):
+        """Log user activity in a session of its own, for use from BackgroundTasks"""
+        db = SessionLocal()
+        try:
+            db.add(ActivityLog(
+                user_id=user_id,
+                action=action,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                description=description,
+                timestamp=datetime.utcnow()
+            ))
+            db.commit()
+        finally:
+            db.close()
 
 # Authentication functions
 def authenticate_user(db: Session, username: str, password: str):
@@ -182,3 +237,16 @@ require_all_users = auth_guard.require_role(['super_admin', 'branch_admin', 'sta
 
 # Branch access dependency
 require_branch_access = auth_guard.require_branch_access
+
+class AccessContext(NamedTuple):
+    """Plain per-request snapshot of who the user is and which branch they may touch"""
+    user_id: int
+    is_super_admin: bool
+    branch_id: Optional[int]
+    
+    def can_access(self, branch_id: int) -> bool:
+        return self.is_super_admin or branch_id == self.branch_id
+
+def staff_access(current_user: User = Depends(require_staff)) -> AccessContext:
+    """Staff-only dependency that resolves the user's access once per request"""
+    return AccessContext(current_user.id, current_user.role == 'super_admin', current_user.branch_id)
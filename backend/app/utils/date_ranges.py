@@ -0,0 +1,23 @@
+"""
+Half-open date range helpers.
+
+Filters built from these use `col >= start AND col < end`, which keeps the
+whole final day in range and lets the database range-scan an index on `col`.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Tuple
+
+
+def day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """Return [start, end) covering a calendar day"""
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=1)
+
+
+def month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    """Return [start, end) covering a calendar month"""
+    start = datetime(year, month, 1)
+    if month == 12:
+        return start, datetime(year + 1, 1, 1)
+    return start, datetime(year, month + 1, 1)
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime, timedelta
 from typing import List, Optional
+import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc, func
@@ -8,6 +9,8 @@ import uuid
 
 from app.models import DailyEntry, Patient, Branch, User, Invoice, LabResult
 from app.utils.auth_system import auth_guard
+from app.utils.date_ranges import month_bounds
+from app.utils.database import SessionLocal
 from app.schemas.user import MonthlyReportRequest, ExportResponse
 
 class ExcelExportService:
@@ -21,23 +24,20 @@ class ExcelExportService:
         year: int, 
         month: int, 
         branch_id: Optional[int] = None,
-        doctor_name: Optional[str] = None
+        doctor_name: Optional[str] = None,
+        job_id: Optional[str] = None
     ) -> ExportResponse:
         """Generate monthly patient history Excel report"""
         
         try:
             # Date range for the month
-            start_date = datetime(year, month, 1)
-            if month == 12:
-                end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+            start_date, end_date = month_bounds(year, month)
             
             # Query daily entries for the month
             query = db.query(DailyEntry).filter(
                 and_(
                     DailyEntry.entry_date >= start_date,
-                    DailyEntry.entry_date <= end_date
+                    DailyEntry.entry_date < end_date
                 )
             )
             
@@ -100,10 +100,12 @@ class ExcelExportService:
             df = pd.DataFrame(report_data)
             
             # Create Excel file with multiple sheets
-            filename = f"vaidya_vihar_monthly_report_{year}_{month:02d}_{uuid.uuid4().hex[:8]}.xlsx"
+            job_id = job_id or self.new_job_id(f"vaidya_vihar_monthly_report_{year}_{month:02d}")
+            filename = f"{job_id}.xlsx"
             filepath = os.path.join(self.base_path, filename)
+            partial_path = os.path.join(self.base_path, f".{filename}")
             
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+            with pd.ExcelWriter(partial_path, engine='openpyxl') as writer:
                 # Main report sheet
                 df.to_excel(writer, sheet_name='Monthly Report', index=False)
                 
@@ -158,6 +160,9 @@ class ExcelExportService:
                 payment_status.columns = ["Payment Status", "Count", "Total Amount", "Total Paid"]
                 payment_status.to_excel(writer, sheet_name='Payment Status', index=False)
             
+            # Publish the finished file in one step so pollers never see a partial workbook
+            os.replace(partial_path, filepath)
+            
             return ExportResponse(
                 success=True,
                 message=f"Monthly report generated successfully for {year}-{month:02d}",
@@ -176,7 +181,8 @@ class ExcelExportService:
         db: Session,
         year: int,
         month: int,
-        branch_id: Optional[int] = None
+        branch_id: Optional[int] = None,
+        job_id: Optional[str] = None
     ) -> ExportResponse:
         """Generate staff attendance Excel report"""
         
@@ -205,17 +211,13 @@ class ExcelExportService:
                 branch = db.query(Branch).filter(Branch.id == staff.branch_id).first()
                 
                 # Get attendance records for the month
-                start_date = datetime(year, month, 1)
-                if month == 12:
-                    end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
-                else:
-                    end_date = datetime(year, month + 1, 1) - timedelta(days=1)
+                start_date, end_date = month_bounds(year, month)
                 
                 attendance_records = db.query(AttendanceRecord).filter(
                     and_(
                         AttendanceRecord.staff_id == staff.id,
                         AttendanceRecord.attendance_date >= start_date,
-                        AttendanceRecord.attendance_date <= end_date
+                        AttendanceRecord.attendance_date < end_date
                     )
                 ).all()
                 
@@ -246,10 +248,12 @@ class ExcelExportService:
             df = pd.DataFrame(report_data)
             
             # Create Excel file
-            filename = f"vaidya_vihar_staff_attendance_{year}_{month:02d}_{uuid.uuid4().hex[:8]}.xlsx"
+            job_id = job_id or self.new_job_id(f"vaidya_vihar_staff_attendance_{year}_{month:02d}")
+            filename = f"{job_id}.xlsx"
             filepath = os.path.join(self.base_path, filename)
+            partial_path = os.path.join(self.base_path, f".{filename}")
             
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+            with pd.ExcelWriter(partial_path, engine='openpyxl') as writer:
                 df.to_excel(writer, sheet_name='Attendance Report', index=False)
                 
                 # Summary sheet
@@ -271,6 +275,9 @@ class ExcelExportService:
                 summary_df = pd.DataFrame(summary_data)
                 summary_df.to_excel(writer, sheet_name='Summary', index=False)
             
+            # Publish the finished file in one step so pollers never see a partial workbook
+            os.replace(partial_path, filepath)
+            
             return ExportResponse(
                 success=True,
                 message=f"Staff attendance report generated successfully for {year}-{month:02d}",
@@ -287,14 +294,35 @@ class ExcelExportService:
     def generate_inventory_report(
         self,
         db: Session,
-        branch_id: Optional[int] = None
+        branch_id: Optional[int] = None,
+        job_id: Optional[str] = None
     ) -> ExportResponse:
         """Generate inventory status Excel report"""
         
         try:
             from app.models import InventoryItem
             
-            query = db.query(InventoryItem)
+            # One query for the item columns and branch name, no per-row lookups
+            query = db.query(
+                InventoryItem.item_code,
+                InventoryItem.item_name,
+                InventoryItem.category,
+                InventoryItem.subcategory,
+                InventoryItem.unit,
+                Branch.name.label("branch_name"),
+                InventoryItem.current_stock,
+                InventoryItem.minimum_stock,
+                InventoryItem.maximum_stock,
+                InventoryItem.reorder_level,
+                InventoryItem.purchase_price,
+                InventoryItem.selling_price,
+                InventoryItem.supplier,
+                InventoryItem.supplier_contact,
+                InventoryItem.batch_number,
+                InventoryItem.expiry_date,
+                InventoryItem.manufacture_date,
+                InventoryItem.last_restocked
+            ).outerjoin(Branch, Branch.id == InventoryItem.branch_id)
             
             # Filter by branch if specified
             if branch_id:
@@ -308,64 +336,55 @@ class ExcelExportService:
                     message="No inventory items found"
                 )
             
-            report_data = []
+            raw = pd.DataFrame(items, columns=list(items[0]._fields))
             
-            for item in items:
-                # Get branch info
-                branch = db.query(Branch).filter(Branch.id == item.branch_id).first()
-                
-                # Calculate stock status
-                if item.current_stock <= 0:
-                    stock_status = "Out of Stock"
-                elif item.current_stock <= item.minimum_stock:
-                    stock_status = "Low Stock"
-                elif item.current_stock >= item.maximum_stock:
-                    stock_status = "Overstocked"
-                else:
-                    stock_status = "Normal"
-                
-                # Check expiry status
-                expiry_status = "N/A"
-                if item.expiry_date:
-                    days_to_expiry = (item.expiry_date - datetime.now()).days
-                    if days_to_expiry < 0:
-                        expiry_status = "Expired"
-                    elif days_to_expiry <= 30:
-                        expiry_status = "Expiring Soon"
-                    else:
-                        expiry_status = "Valid"
-                
-                report_data.append({
-                    "Item Code": item.item_code,
-                    "Item Name": item.item_name,
-                    "Category": item.category,
-                    "Subcategory": item.subcategory or "N/A",
-                    "Unit": item.unit,
-                    "Branch": branch.name if branch else "N/A",
-                    "Current Stock": item.current_stock,
-                    "Minimum Stock": item.minimum_stock,
-                    "Maximum Stock": item.maximum_stock,
-                    "Reorder Level": item.reorder_level,
-                    "Stock Status": stock_status,
-                    "Purchase Price": float(item.purchase_price),
-                    "Selling Price": float(item.selling_price),
-                    "Supplier": item.supplier or "N/A",
-                    "Supplier Contact": item.supplier_contact or "N/A",
-                    "Batch Number": item.batch_number or "N/A",
-                    "Expiry Date": item.expiry_date.strftime("%Y-%m-%d") if item.expiry_date else "N/A",
-                    "Expiry Status": expiry_status,
-                    "Manufacture Date": item.manufacture_date.strftime("%Y-%m-%d") if item.manufacture_date else "N/A",
-                    "Last Restocked": item.last_restocked.strftime("%Y-%m-%d %H:%M") if item.last_restocked else "N/A"
-                })
+            # Stock and expiry status computed over whole columns
+            stock = raw["current_stock"].to_numpy()
+            stock_status = np.select(
+                [stock <= 0, stock <= raw["minimum_stock"].to_numpy(), stock >= raw["maximum_stock"].to_numpy()],
+                ["Out of Stock", "Low Stock", "Overstocked"],
+                default="Normal"
+            )
+            
+            expiry_date = pd.to_datetime(raw["expiry_date"])
+            days_to_expiry = (expiry_date - datetime.now()) // pd.Timedelta(days=1)
+            expiry_status = np.select(
+                [expiry_date.isna(), days_to_expiry < 0, days_to_expiry <= 30],
+                ["N/A", "Expired", "Expiring Soon"],
+                default="Valid"
+            )
             
             # Create DataFrame
-            df = pd.DataFrame(report_data)
+            df = pd.DataFrame({
+                "Item Code": raw["item_code"],
+                "Item Name": raw["item_name"],
+                "Category": raw["category"],
+                "Subcategory": raw["subcategory"].fillna("N/A"),
+                "Unit": raw["unit"],
+                "Branch": raw["branch_name"].fillna("N/A"),
+                "Current Stock": raw["current_stock"],
+                "Minimum Stock": raw["minimum_stock"],
+                "Maximum Stock": raw["maximum_stock"],
+                "Reorder Level": raw["reorder_level"],
+                "Stock Status": stock_status,
+                "Purchase Price": raw["purchase_price"].astype(float),
+                "Selling Price": raw["selling_price"].astype(float),
+                "Supplier": raw["supplier"].fillna("N/A"),
+                "Supplier Contact": raw["supplier_contact"].fillna("N/A"),
+                "Batch Number": raw["batch_number"].fillna("N/A"),
+                "Expiry Date": expiry_date.dt.strftime("%Y-%m-%d").fillna("N/A"),
+                "Expiry Status": expiry_status,
+                "Manufacture Date": pd.to_datetime(raw["manufacture_date"]).dt.strftime("%Y-%m-%d").fillna("N/A"),
+                "Last Restocked": pd.to_datetime(raw["last_restocked"]).dt.strftime("%Y-%m-%d %H:%M").fillna("N/A")
+            })
             
             # Create Excel file
-            filename = f"vaidya_vihar_inventory_report_{datetime.now().strftime('%Y%m%d')}_{uuid.uuid4().hex[:8]}.xlsx"
+            job_id = job_id or self.new_job_id(f"vaidya_vihar_inventory_report_{datetime.now().strftime('%Y%m%d')}")
+            filename = f"{job_id}.xlsx"
             filepath = os.path.join(self.base_path, filename)
+            partial_path = os.path.join(self.base_path, f".{filename}")
             
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+            with pd.ExcelWriter(partial_path, engine='openpyxl') as writer:
                 df.to_excel(writer, sheet_name='Inventory Report', index=False)
                 
                 # Summary sheet
@@ -403,6 +422,9 @@ class ExcelExportService:
                 category_summary["Total Value"] = category_summary["Current Stock"] * category_summary["Purchase Price"]
                 category_summary.to_excel(writer, sheet_name='Category Summary', index=False)
             
+            # Publish the finished file in one step so pollers never see a partial workbook
+            os.replace(partial_path, filepath)
+            
             return ExportResponse(
                 success=True,
                 message="Inventory report generated successfully",
@@ -416,9 +438,52 @@ class ExcelExportService:
                 message=f"Error generating inventory report: {str(e)}"
             )
     
+    def new_job_id(self, prefix: str) -> str:
+        """Build a unique job id; the finished report is saved as <job_id>.xlsx"""
+        return f"{prefix}_{uuid.uuid4().hex[:8]}"
+    
+    def run_job(self, generate, job_id: str, **kwargs):
+        """Run a report generator outside the request, recording failures for polling"""
+        db = SessionLocal()
+        try:
+            result = generate(db=db, job_id=job_id, **kwargs)
+        finally:
+            db.close()
+        
+        if not result.success:
+            with open(os.path.join(self.base_path, f"{job_id}.error"), "w") as f:
+                f.write(result.message)
+    
+    def job_status(self, job_id: str) -> ExportResponse:
+        """Report whether a queued export has finished, failed or is still running"""
+        job_id = os.path.basename(job_id)
+        filename = f"{job_id}.xlsx"
+        filepath = os.path.join(self.base_path, filename)
+        error_path = os.path.join(self.base_path, f"{job_id}.error")
+        
+        if os.path.exists(filepath):
+            return ExportResponse(
+                success=True,
+                message="Report is ready",
+                job_id=job_id,
+                status="completed",
+                file_path=filepath,
+                download_url=f"/api/export/download/{filename}"
+            )
+        if os.path.exists(error_path):
+            with open(error_path) as f:
+                message = f.read()
+            return ExportResponse(success=False, message=message, job_id=job_id, status="failed")
+        return ExportResponse(
+            success=True,
+            message="Report is being generated",
+            job_id=job_id,
+            status="pending"
+        )
+    
     def download_file(self, filename: str) -> Optional[str]:
         """Download generated Excel file"""
-        filepath = os.path.join(self.base_path, filename)
+        filepath = os.path.join(self.base_path, os.path.basename(filename))
         if os.path.exists(filepath):
             return filepath
         return None
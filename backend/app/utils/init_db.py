@@ -1,9 +1,15 @@
+from sqlalchemy import text
+
 from app.utils.database import engine, Base
 from app.models.branch import Branch
 from app.models.calendar_day import CalendarDay  # Add more models as you build them
+from app.models.doctor import SEED_DOCTOR_NUMBER_SEQ
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    # The sequence may predate existing doctor rows; keep it ahead of them
+    with engine.begin() as conn:
+        conn.execute(text(SEED_DOCTOR_NUMBER_SEQ))
 
 if __name__ == "__main__":
     create_tables()
@@ -0,0 +1,46 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the sort key of the last row on a page, encoded as opaque
+URL-safe base64. Handlers filter with `(sort_col, id) < cursor` so every
+page is an index range seek instead of an OFFSET scan.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row into an opaque cursor"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Decode a cursor, converting each value to the given type"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(types):
+            raise ValueError("cursor length mismatch")
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(values, types)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, *key_attrs: str) -> Optional[str]:
+    """Expose the cursor for the next page in a response header when the page is full"""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    cursor = encode_cursor(*(getattr(last, attr) for attr in key_attrs))
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
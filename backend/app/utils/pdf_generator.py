@@ -1,18 +1,24 @@
-from weasyprint import HTML
+from functools import partial
+
+import anyio
+import anyio.to_thread
+from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
 from jinja2 import Template
 
-def generate_daily_report_pdf(report_data: dict) -> bytes:
-    html_template = """
+# Built once at import: fonts are discovered and the stylesheet parsed a
+# single time instead of on every PDF request
+FONT_CONFIG = FontConfiguration()
+BASE_CSS = CSS(string="""
+    body { font-family: sans-serif; margin: 40px; }
+    h1 { color: #2c3e50; }
+    table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+    th, td { border: 1px solid #ccc; padding: 8px; text-align: left; }
+    th { background-color: #f5f5f5; }
+""", font_config=FONT_CONFIG)
+
+DAILY_REPORT_TEMPLATE = Template("""
     <html>
-    <head>
-        <style>
-            body { font-family: sans-serif; margin: 40px; }
-            h1 { color: #2c3e50; }
-            table { width: 100%; border-collapse: collapse; margin-top: 20px; }
-            th, td { border: 1px solid #ccc; padding: 8px; text-align: left; }
-            th { background-color: #f5f5f5; }
-        </style>
-    </head>
     <body>
         <h1>Daily Report - {{ date }} ({{ branch }})</h1>
         <p>Status: {{ status }}</p>
@@ -44,24 +50,10 @@ def generate_daily_report_pdf(report_data: dict) -> bytes:
         <p><strong>Total Expense:</strong> ₹{{ total_expense }}</p>
     </body>
     </html>
-    """
+""")
 
-    template = Template(html_template)
-    rendered_html = template.render(**report_data)
-    pdf = HTML(string=rendered_html).write_pdf()
-    return pdf
-def generate_invoice_pdf(invoice_data: dict) -> bytes:
-    html_template = """
+INVOICE_TEMPLATE = Template("""
     <html>
-    <head>
-        <style>
-            body { font-family: sans-serif; margin: 40px; }
-            h1 { color: #2c3e50; }
-            table { width: 100%; border-collapse: collapse; margin-top: 20px; }
-            th, td { border: 1px solid #ccc; padding: 8px; text-align: left; }
-            th { background-color: #f5f5f5; }
-        </style>
-    </head>
     <body>
         <h1>Invoice - VaidyaVihar Diagnostic</h1>
         <p><strong>Patient:</strong> {{ patient.name }} ({{ patient.gender }}, Age {{ patient.age }})</p>
@@ -81,8 +73,39 @@ def generate_invoice_pdf(invoice_data: dict) -> bytes:
         <p><strong>Status:</strong> {{ status }}</p>
     </body>
     </html>
-    """
-    template = Template(html_template)
-    rendered_html = template.render(**invoice_data)
-    pdf = HTML(string=rendered_html).write_pdf()
-    return pdf
\ No newline at end of file
+""")
+
+LAB_REPORT_TEMPLATE = Template("""
+    <html>
+    <head><title>Lab Report #{{ test.id }}</title></head>
+    <body>
+        <h1>Lab Report</h1>
+        <p><strong>Test ID:</strong> {{ test.id }}</p>
+        <p><strong>Patient ID:</strong> {{ test.patient_id }}</p>
+        <p><strong>Technician ID:</strong> {{ test.technician_id }}</p>
+        <p><strong>Test Type:</strong> {{ test.test_type }}</p>
+        <p><strong>Status:</strong> {{ test.status }}</p>
+        <p><strong>Result:</strong><br>{{ test.result }}</p>
+        <p><strong>Created At:</strong> {{ test.created_at.strftime('%Y-%m-%d %H:%M') }}</p>
+    </body>
+    </html>
+""")
+
+def render_pdf(template: Template, **context) -> bytes:
+    """Render a precompiled template to PDF with the shared stylesheet and fonts"""
+    html = HTML(string=template.render(**context))
+    return html.write_pdf(stylesheets=[BASE_CSS], font_config=FONT_CONFIG)
+
+# Rendering is CPU-heavy: cap concurrent renders so a burst of downloads
+# cannot take every worker thread from the rest of the API
+PDF_LIMITER = anyio.CapacityLimiter(4)
+
+async def render_pdf_async(template: Template, **context) -> bytes:
+    """Run render_pdf on a worker thread, at most PDF_LIMITER renders at a time"""
+    return await anyio.to_thread.run_sync(partial(render_pdf, template, **context), limiter=PDF_LIMITER)
+
+def generate_daily_report_pdf(report_data: dict) -> bytes:
+    return render_pdf(DAILY_REPORT_TEMPLATE, **report_data)
+
+def generate_invoice_pdf(invoice_data: dict) -> bytes:
+    return render_pdf(INVOICE_TEMPLATE, **invoice_data)